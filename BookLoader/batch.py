@@ -0,0 +1,166 @@
+'''Headless batch ISBN loader'''
+import argparse  # Command line arguments.
+import json  # JSON Lines output.
+import logging  # Logging errors.
+import os  # Just os module?
+import sys  # Standard streams.
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait  # Bounded worker pool.
+from pathlib import Path  # Create a directory if needed.
+
+from book import main as book_mode  # Book sources.
+from configuration import get_settings  # Settings loaded once.
+from woo import batch_main as woo_batch  # WooCommerce bulk upload.
+from woo import get_product as woo_get  # WooCommerce product.
+from wp import seed_media_index  # Known media library images.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
+logging_path = os.path.join(current_dir, "logs", "batch.log")
+logging.basicConfig(filename=logging_path, level=logging.WARNING,
+                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logger=logging.getLogger(__name__)
+
+def get_gui():
+    '''Build the same boxes dictionary as the GUI, sources taken from config'''
+    sources = get_settings().sources
+    return {
+        'google'            :sources['google'],
+        'isbndb'            :sources['isbndb'],
+        'amazon'            :sources['amazon'],
+        'goodreads'         :sources['goodreads'],
+        'title_box'         :True,
+        'authors_box'       :True,
+        'description_box'   :True,
+        'binding_box'       :True,
+        'publisher_box'     :True,
+        'publish_date_box'  :True,
+        'categories_box'    :True,
+        'image_box'         :True
+    }
+
+def get_workers():
+    '''Default size of worker pool'''
+    return get_settings().getint('Batch', 'workers', fallback=8)
+
+def read_isbns(stream):
+    '''Yield ISBNs from stream, one per line'''
+    for line in stream:
+        isbn = line.split('#')[0].strip().replace('-', '').replace(' ', '')
+        if isbn:
+            yield isbn
+
+def load_isbn(isbn, gui, skip_existing=False):
+    '''Look up single ISBN in WooCommerce and book sources'''
+    record = {
+        'isbn'      :isbn,
+        'woo'       :None,
+        'book'      :None,
+        'error'     :None
+    }
+
+    if not (len(isbn) == 13 and isbn.isdigit()):
+        record['error'] = 'Invalid ISBN'
+        return record
+
+    try:
+        record['woo'] = woo_get(isbn, gui) or None
+    except Exception as error: # pylint: disable=broad-except
+        logger.info(error)
+        record['error'] = str(error)
+
+    if record['woo'] and skip_existing:
+        return record
+
+    try:
+        record['book'] = book_mode(isbn, gui) or None
+    except Exception as error: # pylint: disable=broad-except
+        logger.info(error)
+        record['error'] = str(error)
+
+    return record
+
+def run(isbns, output, workers, skip_existing=False):
+    '''Run lookups in bounded pool and stream records as JSON Lines'''
+    gui = get_gui()
+    done = 0
+    pending = set()
+
+    def flush(futures):
+        '''Write finished records'''
+        nonlocal done
+        for future in futures:
+            output.write(json.dumps(future.result(), ensure_ascii=False, default=str) + '\n')
+            output.flush()
+            done += 1
+        print('Done: %d' % done, file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for isbn in isbns:
+            # Keep only a limited window in flight, input can be endless stdin.
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                flush(finished)
+            pending.add(executor.submit(load_isbn, isbn, gui, skip_existing))
+
+        finished, pending = wait(pending)
+        flush(finished)
+
+    return done
+
+def read_products(stream):
+    '''Yield product dictionaries from JSON Lines stream'''
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+def upload(products, output):
+    '''Send products with WooCommerce batch endpoint and write result of every ISBN'''
+    results = woo_batch(list(products))
+    for isbn, result in results.items():
+        record = {
+            'isbn'      :isbn,
+            'woo'       :None if 'error' in result else result,
+            'error'     :result.get('error')
+        }
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    output.flush()
+    print('Uploaded: %d' % sum(1 for result in results.values() if 'error' not in result), file=sys.stderr) # pylint: disable=line-too-long
+    return len(results)
+
+def main(argv=None):
+    '''Main function'''
+    parser = argparse.ArgumentParser(description='Load books for list of ISBNs without GUI.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file with one ISBN per line, "-" reads from stdin')
+    parser.add_argument('-o', '--output', default='-',
+                        help='JSON Lines output file, "-" writes to stdout')
+    parser.add_argument('-w', '--workers', type=int, default=get_workers(),
+                        help='number of ISBNs processed concurrently')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='do not query book sources for products found in WooCommerce')
+    parser.add_argument('--upload', action='store_true',
+                        help='input is JSON Lines of products to create or update in WooCommerce')
+    parser.add_argument('--seed-media', action='store_true',
+                        help='hash images already in WordPress media library, so they are not uploaded again') # pylint: disable=line-too-long
+    args = parser.parse_args(argv)
+
+    if args.seed_media:
+        print('Indexed: %d' % seed_media_index(max(1, args.workers)), file=sys.stderr)
+        return
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8') # pylint: disable=consider-using-with
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8') # pylint: disable=consider-using-with
+
+    try:
+        if args.upload:
+            upload(read_products(source), output)
+        else:
+            run(read_isbns(source), output, max(1, args.workers), args.skip_existing)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == "__main__":
+    main()
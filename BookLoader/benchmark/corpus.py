@@ -0,0 +1,101 @@
+'''Recorded corpus of scrapped pages
+
+Layout: corpus/index.json maps every requested url to its page file, status and
+content type, corpus/pages/<sha1 of url>.html holds response body. Record with
+py benchmark/corpus.py 9780441013593 9780141187761 ... (needs network).
+'''
+import argparse  # Command line.
+import hashlib  # Page file names.
+import json  # Index.
+import os  # Just os module?
+import sys  # Import path.
+import threading  # Scrappers record from many threads.
+from pathlib import Path  # Create a directory if needed.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# pylint: disable=wrong-import-position
+from configuration import get_settings
+from private import amazon_scrapper, goodread_scrapper, transport
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "corpus")
+
+class Corpus:
+    '''Pages of corpus folder keyed by requested url'''
+    def __init__(self, folder=CORPUS_DIR):
+        '''init Corpus class'''
+        self.folder = folder
+        self.index_path = os.path.join(folder, "index.json")
+        self.lock = threading.Lock()
+        try:
+            with open(self.index_path, encoding='utf-8') as file:
+                index = json.load(file)
+        except FileNotFoundError:
+            index = {}
+        self.isbns = index.get("isbns", [])
+        self.pages = index.get("pages", {})
+        self.synthetic = index.get("synthetic", False)
+
+    def get(self, url):
+        '''Get (status, content type, body) or None'''
+        page = self.pages.get(url)
+        if page is None:
+            return None
+        with open(os.path.join(self.folder, "pages", page["file"]), 'rb') as file:
+            return page["status"], page["type"], file.read()
+
+    def add(self, url, status, content_type, body):
+        '''Store page'''
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest() + ".html"
+        Path(os.path.join(self.folder, "pages")).mkdir(parents=True, exist_ok=True)
+        with open(os.path.join(self.folder, "pages", name), 'wb') as file:
+            file.write(body)
+        with self.lock:
+            self.pages[url] = {"file": name, "status": status, "type": content_type}
+
+    def save(self):
+        '''Write index'''
+        Path(self.folder).mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.index_path, 'w', encoding='utf-8') as file:
+            json.dump({"isbns": self.isbns, "synthetic": self.synthetic, "pages": self.pages},
+                      file, indent=1, sort_keys=True)
+
+def record(corpus, isbns):
+    '''Run both scrappers live and store every page they download'''
+    get = transport.get
+
+    def recording_get(url, headers=None, **kwargs):
+        '''Live request, stored under requested url'''
+        response = get(url, headers=headers, **kwargs)
+        corpus.add(url, response.status_code,
+                   response.headers.get("Content-Type", "text/html; charset=utf-8"),
+                   response.content)
+        return response
+
+    # Every found product page is recorded, replay may not stop on the same page
+    get_settings().config.set("Scraper", "amazon_matches", "0")
+    transport.get = recording_get
+    try:
+        for isbn in isbns:
+            amazon = amazon_scrapper.main(isbn)
+            goodreads = goodread_scrapper.goodread_search(isbn)
+            print("%s amazon: %s, goodreads: %s" % (isbn, amazon.get("title"), goodreads.get("title")))
+            if isbn not in corpus.isbns:
+                corpus.isbns.append(isbn)
+    finally:
+        transport.get = get
+        corpus.save()
+
+def main():
+    '''Main function'''
+    parser = argparse.ArgumentParser(description="Record scrapped pages of books")
+    parser.add_argument("isbns", nargs="+", help="ISBN-13 of books")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="corpus folder")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus)
+    record(corpus, args.isbns)
+    print("%d pages in %s" % (len(corpus.pages), args.corpus))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+'''Micro benchmark of per book extraction from API responses'''
+import json  # Decode responses.
+import os  # Just os module?
+import sys  # Import path.
+import timeit  # Measure.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from records import BookRecord, list_expander  # pylint: disable=wrong-import-position
+
+GOOGLE = {
+    "kind": "books#volumes",
+    "totalItems": 1,
+    "items": [{
+        "kind": "books#volume",
+        "id": "B1hSG45JCX4C",
+        "etag": "5PqKbHzsV4g",
+        "selfLink": "https://www.googleapis.com/books/v1/volumes/B1hSG45JCX4C",
+        "volumeInfo": {
+            "title": "Dune",
+            "authors": ["Frank Herbert"],
+            "publisher": "Penguin",
+            "publishedDate": "2005-08-02",
+            "description": "<p>Set on the desert planet Arrakis, Dune is the story of the boy "
+                           "Paul Atreides. </p>" * 20,
+            "industryIdentifiers": [{"type": "ISBN_10", "identifier": "0441013597"},
+                                    {"type": "ISBN_13", "identifier": "9780441013593"}],
+            "readingModes": {"text": False, "image": False},
+            "pageCount": 528,
+            "printType": "BOOK",
+            "categories": ["Fiction"],
+            "averageRating": 4,
+            "ratingsCount": 1254,
+            "maturityRating": "NOT_MATURE",
+            "imageLinks": {"smallThumbnail": "http://books.google.com/books/content?id=B1hSG45JCX4C",
+                           "thumbnail": "http://books.google.com/books/content?id=B1hSG45JCX4C"},
+            "language": "en",
+        },
+        "saleInfo": {"country": "PL", "saleability": "NOT_FOR_SALE", "isEbook": False},
+        "accessInfo": {"country": "PL", "viewability": "NO_PAGES", "embeddable": False,
+                       "publicDomain": False, "textToSpeechPermission": "ALLOWED",
+                       "epub": {"isAvailable": False}, "pdf": {"isAvailable": False}},
+        "searchInfo": {"textSnippet": "Set on the desert planet Arrakis"},
+    }]
+}
+
+ISBNDB = {
+    "book": {
+        "publisher": "Ace",
+        "synopsys": "Set on the desert planet Arrakis, Dune is the story of the boy. " * 20,
+        "language": "en",
+        "image": "https://images.isbndb.com/covers/35/93/9780441013593.jpg",
+        "title_long": "Dune",
+        "dimensions": "Height: 6.75 Inches, Length: 4.25 Inches, Weight: 0.6 Pounds",
+        "pages": 896,
+        "date_published": "2005-08-02",
+        "subjects": ["Dune (Imaginary place)--Fiction", "Science fiction"],
+        "authors": ["Herbert, Frank"],
+        "title": "Dune",
+        "isbn13": "9780441013593",
+        "msrp": "9.99",
+        "binding": "Mass Market Paperback",
+        "isbn": "0441013597",
+    }
+}
+
+FIELDS = ('title', 'authors', 'description', 'binding', 'publisher', 'publish_date',
+          'categories', 'image')
+
+class Response: # pylint: disable=too-few-public-methods
+    '''Stand-in for requests.Response, json() decodes body on every call'''
+    def __init__(self, data):
+        self.content = json.dumps(data)
+
+    def json(self):
+        '''Decode body'''
+        return json.loads(self.content)
+
+def before_google(response, lists):
+    '''Extraction as done before, one decode per field'''
+    for append in (
+            lambda: lists['title'].append({"google" : response.json()["items"][0]["volumeInfo"]["title"]}), # pylint: disable=line-too-long
+            lambda: lists['authors'].append({"google" : list_expander(response.json()["items"][0]["volumeInfo"]["authors"])}), # pylint: disable=line-too-long
+            lambda: lists['description'].append({"google" : response.json()["items"][0]["volumeInfo"]["description"]}), # pylint: disable=line-too-long
+            lambda: lists['publisher'].append({"google" : response.json()["items"][0]["volumeInfo"]["publisher"]}), # pylint: disable=line-too-long
+            lambda: lists['publish_date'].append({"google" : response.json()["items"][0]["volumeInfo"]["publishedDate"][:4]}), # pylint: disable=line-too-long
+            lambda: lists['categories'].extend(response.json()["items"][0]["volumeInfo"]["categories"])): # pylint: disable=line-too-long
+        try:
+            append()
+        except Exception: # pylint: disable=broad-except
+            pass
+
+def before_isbndb(response, lists):
+    '''Extraction as done before, one decode per field'''
+    for append in (
+            lambda: lists['title'].append({"isbn" : response.json()["book"]["title"]}),
+            lambda: lists['authors'].append({"isbn" : list_expander(response.json()["book"]["authors"])}), # pylint: disable=line-too-long
+            lambda: lists['binding'].append({"isbn" : response.json()["book"]["binding"]}),
+            lambda: lists['publisher'].append({"isbn" : response.json()["book"]["publisher"]}),
+            lambda: lists['publish_date'].append({"isbn" : response.json()["book"]["date_published"][:4]}), # pylint: disable=line-too-long
+            lambda: lists['categories'].extend(response.json()["book"]["subjects"])):
+        try:
+            append()
+        except Exception: # pylint: disable=broad-except
+            pass
+
+def after(source, record, lists):
+    '''Extraction from record decoded once'''
+    for field, value in record.fields():
+        if field == 'categories':
+            lists[field] += value
+        else:
+            lists[field].append({source : value})
+
+def run_before(google, isbndb):
+    '''Single book, old way'''
+    lists = {field: [] for field in FIELDS}
+    before_google(google, lists)
+    before_isbndb(isbndb, lists)
+    return lists
+
+def run_after(google, isbndb):
+    '''Single book, new way'''
+    lists = {field: [] for field in FIELDS}
+    after("google", BookRecord.from_google(google.json()), lists)
+    after("isbn", BookRecord.from_isbndb(isbndb.json()), lists)
+    return lists
+
+def main(number=20000):
+    '''Main function'''
+    google = Response(GOOGLE)
+    isbndb = Response(ISBNDB)
+    assert run_before(google, isbndb) == run_after(google, isbndb)
+
+    for name, function in (("before", run_before), ("after", run_after)):
+        seconds = min(timeit.repeat(lambda: function(google, isbndb), number=number, repeat=3)) # pylint: disable=cell-var-from-loop
+        print("%-7s %8.2f us per book" % (name, seconds / number * 1e6))
+
+if __name__ == "__main__":
+    main()
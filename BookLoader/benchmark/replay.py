@@ -0,0 +1,82 @@
+'''Local stand-in server replaying recorded pages
+
+Scrappers are pointed to it with [Scraper] replay = http://127.0.0.1:8765, then
+https://www.amazon.co.uk/s?k=... is requested as http://127.0.0.1:8765/www.amazon.co.uk/s?k=...
+Start with py benchmark/replay.py [--port 8765] [--delay 0.2].
+'''
+import argparse  # Command line.
+import os  # Just os module?
+import sys  # Import path.
+import threading  # Server thread.
+import time  # Simulated latency.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Local server.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmark.corpus import CORPUS_DIR, Corpus
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    '''Serve page recorded for requested url, 404 for unknown urls'''
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self): # pylint: disable=invalid-name
+        '''Answer GET'''
+        server = self.server
+        if server.delay:
+            time.sleep(server.delay)
+        page = server.corpus.get("https:/" + self.path)
+        with server.lock:
+            server.served += 1
+            if page is None:
+                server.missing.append("https:/" + self.path)
+        status, content_type, body = page if page else (404, "text/html", b"")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        '''No log line per request'''
+
+class ReplayServer(ThreadingHTTPServer):
+    '''Replay server counting served requests'''
+    daemon_threads = True
+
+    def __init__(self, corpus, port=0, delay=0):
+        '''init ReplayServer class, port 0 picks free port, delay in seconds per request'''
+        self.corpus = corpus
+        self.delay = delay
+        self.served = 0
+        self.missing = []
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+
+    @property
+    def url(self):
+        '''Base url for [Scraper] replay'''
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+    def start(self):
+        '''Serve in background thread'''
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def main():
+    '''Main function'''
+    parser = argparse.ArgumentParser(description="Replay recorded scrapped pages")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="corpus folder")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0, help="seconds before every answer")
+    args = parser.parse_args()
+
+    server = ReplayServer(Corpus(args.corpus), args.port, args.delay)
+    print("Replaying %d pages on %s" % (len(server.corpus.pages), server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
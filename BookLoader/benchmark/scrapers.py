@@ -0,0 +1,126 @@
+'''Offline benchmark of Amazon and Goodreads scrappers
+
+Both scrappers run whole lookups (search, product pages, parsing) against local replay
+server of recorded corpus, see benchmark/corpus.py. Without corpus SYNTHETIC pages of
+benchmark/scraping.py are replayed. Reports pages per second, parse time per page and
+python memory peak of every scrapper.
+'''
+import argparse  # Command line.
+import os  # Just os module?
+import sys  # Import path.
+import tempfile  # Synthetic corpus.
+import time  # Measure.
+import tracemalloc  # Python memory peak.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmark import scraping
+from benchmark.corpus import CORPUS_DIR, Corpus
+from benchmark.replay import ReplayServer
+from configuration import get_settings
+from private import amazon_scrapper, goodread_scrapper, page_parser
+
+SCRAPPERS = (
+    ("amazon", amazon_scrapper.main),
+    ("goodreads", goodread_scrapper.goodread_search)
+)
+
+def synthetic_corpus(folder):
+    '''Corpus of synthetic pages of one book'''
+    corpus = Corpus(folder)
+    corpus.isbns = [scraping.ISBN]
+    corpus.synthetic = True
+    html = "text/html; charset=utf-8"
+    search = scraping.build(scraping.AMAZON_SEARCH).content
+    product = scraping.build(scraping.AMAZON_PRODUCT).content
+    for domain in ("www.amazon.co.uk", "www.amazon.com"):
+        corpus.add("https://%s/s?k=%s&ref=nb_sb_noss" % (domain, scraping.ISBN), 200, html, search)
+        corpus.add("https://%s/Dune-Frank-Herbert/dp/%s/ref=sr_1_1?pb=1" % (domain, scraping.ISBN),
+                   200, html, product)
+    corpus.add("https://www.goodreads.com/search?q=" + scraping.ISBN, 200, html,
+               scraping.build(scraping.GOODREADS_BOOK).content)
+    corpus.save()
+    return corpus
+
+class ParseTimer:
+    '''Wraps page_parser.parse, sums its time'''
+    def __init__(self):
+        '''init ParseTimer class'''
+        self.parse = page_parser.parse
+        self.seconds = 0
+        self.pages = 0
+
+    def __call__(self, page, scope=None):
+        start = time.perf_counter()
+        try:
+            return self.parse(page, scope)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.pages += 1
+
+def run(server, function, isbns, rounds):
+    '''Seconds, served pages and parse timer of rounds of lookups'''
+    timer = ParseTimer()
+    page_parser.parse = timer
+    served = server.served
+    start = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            for isbn in isbns:
+                function(isbn)
+    finally:
+        page_parser.parse = timer.parse
+    return time.perf_counter() - start, server.served - served, timer
+
+def memory_peak(function, isbns):
+    '''Python memory peak in bytes of one round of lookups'''
+    tracemalloc.start()
+    try:
+        for isbn in isbns:
+            function(isbn)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    '''Main function'''
+    parser = argparse.ArgumentParser(description="Offline scrappers benchmark")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="corpus folder")
+    parser.add_argument("--rounds", type=int, default=5, help="lookups of every ISBN")
+    parser.add_argument("--delay", type=float, default=0, help="server latency in seconds")
+    parser.add_argument("--rate", default="0", help="[Scraper] rate, 0 is no limit")
+    parser.add_argument("--matches", default=None, help="[Scraper] amazon_matches")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus)
+    with tempfile.TemporaryDirectory() as folder:
+        if not corpus.pages:
+            corpus = synthetic_corpus(folder)
+
+        server = ReplayServer(corpus, delay=args.delay).start()
+        # Set before transport and scheduler are created
+        settings = get_settings()
+        settings.config.set("Scraper", "replay", server.url)
+        settings.config.set("Scraper", "rate", args.rate)
+        if args.matches is not None:
+            settings.config.set("Scraper", "amazon_matches", args.matches)
+
+        print("%s corpus: %d books, %d pages, server delay %.3f s" % (
+            "SYNTHETIC" if corpus.synthetic else "Recorded", len(corpus.isbns), len(corpus.pages),
+            args.delay))
+        for name, function in SCRAPPERS:
+            # Warm up connections and imports
+            function(corpus.isbns[0])
+            seconds, served, timer = run(server, function, corpus.isbns, args.rounds)
+            peak = memory_peak(function, corpus.isbns)
+            print("%-10s %7.1f pages/s %7.1f lookups/s %8.2f ms parse per page %8d kB python peak"
+                  % (name, served / seconds, args.rounds * len(corpus.isbns) / seconds,
+                     timer.seconds / max(timer.pages, 1) * 1e3, peak // 1024))
+
+        if server.missing:
+            print("%d requests not in corpus, e.g. %s" % (len(server.missing), server.missing[0]))
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
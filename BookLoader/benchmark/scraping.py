@@ -0,0 +1,192 @@
+'''Benchmark of full and scoped parsing of scrapped pages
+
+Pages are SYNTHETIC, built below to look like Amazon and Goodreads markup (details,
+description, categories, inline scripts and carousels around them). Saved real pages
+can be given instead: py benchmark/scraping.py --amazon page.html --goodreads page.html
+Memory peak counts python objects only, lxml tree is allocated outside of tracemalloc.
+'''
+import argparse  # Command line.
+import os  # Just os module?
+import sys  # Import path.
+import timeit  # Measure.
+import tracemalloc  # Python memory peak.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# pylint: disable=wrong-import-position
+from bs4 import BeautifulSoup  # Full parse.
+from private import amazon_scrapper, goodread_scrapper, page_parser, transport
+
+ISBN = "9780441013593"
+
+FILLER = ('<div class="a-carousel-card"><a class="a-link-normal" href="/dp/B00{0}">'
+          '<img alt="Book {0}" src="https://m.media-amazon.com/images/I/{0}.jpg" '
+          'data-a-hires="https://m.media-amazon.com/images/I/{0}_SL500.jpg"></a>'
+          '<span class="a-size-small">Customers also bought &amp; read {0}</span>'
+          '<i class="a-icon a-icon-star-small"></i><span class="a-price">$9.{0}</span></div>\n')
+
+SCRIPT = ('<script type="text/javascript">P.when("A").execute(function(A){{'
+          'var data = {{"asin": "B00{0}", "price": "9.99", "items": [1, 2, 3]}};'
+          ' if (a < b && c > d) {{ A.trigger("load", data); }} }});</script>\n')
+
+AMAZON_PRODUCT = '''<!doctype html><html lang="en-gb"><head><meta charset="utf-8">
+<title>Dune: Amazon.co.uk: Herbert, Frank: Books</title>{scripts}</head><body>
+<div id="dp-container">{filler}
+<div id="centerCol"><h1 id="title"><span id="productTitle" class="a-size-extra-large">
+Dune
+</span></h1>
+<div id="bylineInfo"><span class="author notFaded" data-width="">
+<a class="a-link-normal" href="/Frank-Herbert/e/B000AQ0RJM">Frank Herbert</a>
+<span class="contribution"><span class="a-color-secondary">(Author)</span></span></span>
+<span class="author notFaded"><a class="a-link-normal" href="/x">Brian Herbert</a>
+<span class="contribution">(Introduction)</span></span></div></div>
+<div id="imageBlock"><img id="imgBlkFront" alt="Dune" src="https://m.media-amazon.com/images/I/41x.jpg"
+data-a-dynamic-image="{{&quot;https://m.media-amazon.com/images/I/41x.jpg&quot;:[333,500],&quot;https://m.media-amazon.com/images/I/81x.jpg&quot;:[1000,1500]}}"></div>
+<div id="bookDescription_feature_div" class="celwidget">
+<div data-a-expander-name="book_description_expander" class="a-expander-collapsed-height">
+<div class="a-expander-content"><span><p><b>Before <i>The Matrix</i>, before <i>Star Wars</i> &mdash; there was <i>Dune</i>.</b></p>
+<p>Set on the desert planet Arrakis, Dune is the story of Paul Atreides&nbsp;&amp; his family.<br>
+Caf&eacute; &lt;spice&gt; melange.</p></span></div></div>
+<script>P.when("a-expander").execute(function(){{}});</script></div>
+{filler}
+<div id="detailBulletsWrapper_feature_div"><div id="detailBullets_feature_div">
+<ul class="a-unordered-list a-nostyle a-vertical a-spacing-none detail-bullet-list">
+<li><span class="a-list-item"><span class="a-text-bold">Publisher
+&rlm;
+:
+&lrm;
+</span>
+<span>Hodder Paperbacks; New edition (1 Jun. 2006)</span></span></li>
+<li><span class="a-list-item"><span class="a-text-bold">Language
+&rlm;
+:
+&lrm;
+</span>
+<span>English</span></span></li>
+<li><span class="a-list-item"><span class="a-text-bold">Paperback
+&rlm;
+:
+&lrm;
+</span>
+<span>592 pages</span></span></li>
+<li><span class="a-list-item"><span class="a-text-bold">ISBN-13
+&rlm;
+:
+&lrm;
+</span>
+<span>978-0441013593</span></span></li>
+</ul></div>
+<ul class="a-unordered-list a-nostyle a-vertical a-spacing-none detail-bullet-list">
+<li><span class="a-list-item"><span class="a-text-bold">Best Sellers Rank: </span> 1,024 in Books
+<ul class="a-unordered-list a-nostyle a-vertical zg_hrsr">
+<li><span class="a-list-item"> 12 in <a href="/gp/bestsellers/books/279">Science Fiction (Books)</a></span></li>
+<li><span class="a-list-item"> 30 in <a href="/gp/bestsellers/books/280">Space Opera (Books)</a></span></li>
+</ul></span></li></ul></div>
+{filler}</div></body></html>'''
+
+AMAZON_SEARCH = '''<!doctype html><html><head><meta charset="utf-8">{scripts}</head><body>{filler}
+<div class="s-main-slot s-result-list s-search-results sg-row">
+<div class="a-section a-spacing-medium"><h2><a class="a-link-normal" href="/Dune-Frank-Herbert/dp/{isbn}/ref=sr_1_1">Dune</a></h2>
+<a class="a-link-normal" href="/Dune-Frank-Herbert/dp/{isbn}/ref=sr_1_1?pb=1">Paperback</a>
+<a class="a-link-normal" href="/Dune-Frank-Herbert/dp/B00B7NPRY8/ref=sr_1_1?k=1">Kindle Edition</a></div>
+<div class="a-section a-spacing-medium"><a class="a-link-normal" href="/Dune/dp/0340960191/ref=sr_1_2">Hardcover</a></div>
+</div>{filler}</body></html>'''
+
+GOODREADS_BOOK = '''<!DOCTYPE html><html><head><meta charset="utf-8">{scripts}</head><body>
+<div class="siteHeader"><span itemprop="name" class="hidden">Goodreads</span></div>{filler}
+<div id="topcol"><div id="imagecol"><img id="coverImage" alt="Dune" src="https://i.gr-assets.com/images/S/dune.jpg"></div>
+<div id="metacol"><h1 id="bookTitle" class="gr-h1 gr-h1--serif" itemprop="name">
+      Dune
+</h1>
+<div id="bookAuthors"><span class="by">by</span>
+<span itemprop="author"><div class="authorName__container"><a class="authorName" href="/author/show/58.Frank_Herbert"><span itemprop="name">Frank Herbert</span></a></div></span></div>
+<div id="description" class="readable stacked"><span id="freeTextContainer1">Set on the desert planet Arrakis&hellip;</span>
+<span id="freeText1" style="display:none">Set on the desert planet Arrakis, <i>Dune</i> is the story of the boy Paul Atreides &amp; his family.<br><br>Caf&eacute; &lt;spice&gt;.</span>
+<a href="#" onclick="swapContent($(this));return false;">...more</a></div>
+<div id="details" class="uitext darkGreyText">
+<div class="row"><span itemprop="bookFormat">Paperback</span>, <span itemprop="numberOfPages">896 pages</span></div>
+<div class="row">
+        Published
+        August 2nd 2005
+        by Ace Books
+        <nobr class="greyText">(first published 1965)</nobr>
+</div></div></div></div>{filler}
+<div class="rightContainer"><div class="bigBoxContent containerWithHeaderContent">
+<div class="elementList"><a class="actionLinkLite bookPageGenreLink" href="/genres/science-fiction">Science Fiction</a></div>
+<div class="elementList"><a class="actionLinkLite bookPageGenreLink" href="/genres/fiction">Fiction</a></div>
+<div class="elementList"><a class="actionLinkLite bookPageGenreLink" href="/genres/fantasy">Fantasy</a></div>
+<div class="elementList"><a class="actionLinkLite bookPageGenreLink" href="/genres/classics">Classics</a></div>
+</div></div></body></html>'''
+
+class Page: # pylint: disable=too-few-public-methods
+    '''Stand-in for requests.Response'''
+    def __init__(self, content, encoding='utf-8'):
+        self.content = content
+        self.encoding = encoding
+
+def build(template, size=400):
+    '''Synthetic page with size filler blocks around scrapped parts'''
+    filler = ''.join(FILLER.format(index) for index in range(size))
+    scripts = ''.join(SCRIPT.format(index) for index in range(size // 4))
+    return Page(template.format(filler=filler, scripts=scripts, isbn=ISBN).encode('utf-8'))
+
+def full_parse(page, scope=None): # pylint: disable=unused-argument
+    '''Parse as done before, whole page to Soup'''
+    return BeautifulSoup(page.content, 'lxml', from_encoding=page.encoding)
+
+def scrap(pages, parse):
+    '''Output of both scrappers served from pages with given parse function'''
+    scoped = page_parser.parse
+    get = transport.get
+    page_parser.parse = parse
+    transport.get = lambda url, headers=None, **kwargs: pages["goodreads" if "goodreads" in url else
+                                                             "search" if "/s?" in url else "amazon"]
+    try:
+        return amazon_scrapper.main(ISBN), goodread_scrapper.goodread_search(ISBN)
+    finally:
+        page_parser.parse = scoped
+        transport.get = get
+
+def measure(function, number):
+    '''Seconds per call and python memory peak in bytes'''
+    seconds = min(timeit.repeat(function, number=number, repeat=3)) / number
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+def main():
+    '''Main function'''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument("--amazon", help="saved Amazon product page")
+    parser.add_argument("--goodreads", help="saved Goodreads book page")
+    parser.add_argument("--number", type=int, default=20, help="parses per measurement")
+    args = parser.parse_args()
+
+    pages = {
+        "amazon"    :build(AMAZON_PRODUCT),
+        "search"    :build(AMAZON_SEARCH),
+        "goodreads" :build(GOODREADS_BOOK)
+    }
+    for name in ("amazon", "goodreads"):
+        if getattr(args, name):
+            with open(getattr(args, name), 'rb') as file:
+                pages[name] = Page(file.read())
+
+    before = scrap(pages, full_parse)
+    after = scrap(pages, page_parser.parse)
+    assert before == after, (before, after)
+    print("Same output of both scrappers: %s" % (after,))
+    print("Synthetic pages" if not (args.amazon or args.goodreads) else "Saved pages")
+
+    for name, scope in (("search", amazon_scrapper.SEARCH), ("amazon", amazon_scrapper.PRODUCT),
+                        ("goodreads", goodread_scrapper.BOOK)):
+        page = pages[name]
+        print("%-10s %7d kB" % (name, len(page.content) // 1024))
+        for label, parse in (("full", full_parse), ("scoped", page_parser.parse)):
+            seconds, peak = measure(lambda: parse(page, scope), args.number) # pylint: disable=cell-var-from-loop
+            print("  %-7s %8.2f ms per page %8d kB python peak" % (label, seconds * 1e3, peak // 1024))
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,37 @@
 '''book'''
-import ast  # Use to read list from config file.
-import configparser  # Read config file.
 import logging  # Logging errors.
-import os  # Just os module?
 import re  # Regex.
-from pathlib import Path  # Create a directory if needed.
-from threading import Thread  # Multi thread.
 
-import requests as req  # Requests HTTP Library.
-import requests_cache  # Cache API requests.
-from fuzzywuzzy import fuzz  # String similarity.
+from rapidfuzz import fuzz, process  # String similarity.
 
+from configuration import get_logger, get_settings  # Settings loaded once.
+from engine import get_engine  # Shared event loop for sources.
+from metadata_cache import get_cache  # Cache parsed source data.
+from records import BookRecord, list_expander # pylint: disable=unused-import
 from private.amazon_scrapper import main as amazon_scrapper  # Amazon scrapper.
 from private.goodread_scrapper import \
     goodread_search as goodreads_scrapper  # goodreads scrapper.
 
-current_dir = (os.path.dirname(os.path.realpath(__file__)))
-logging_path = os.path.join(current_dir, "logs", "book.log")
+logger=get_logger(__name__, "book.log", logging.WARNING)
 
-logging.basicConfig(filename=logging_path, level=logging.WARNING,
-                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
-logger=logging.getLogger(__name__)
+# Source name kept in field lists
+SOURCE_LABELS = {"isbndb": "isbn"}
 
 class Books: # pylint: disable=too-few-public-methods, too-many-instance-attributes
     '''Book class'''
-    def __init__(self, isbn, gui):
-        '''init Book class'''
+    def __init__(self, isbn, gui, progress=None):
+        '''init Book class, progress(source) is called when each source is finished'''
         self.isbn = isbn
-        config = configparser.ConfigParser()
-        config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-        self.google_token = config.get("Google", "token")
-        self.isbndb_token = config.get("ISBNdb", "token")
-        self.google_url = config.get("Google", "url")
-        self.isbndb_url = config.get("ISBNdb", "url")
+        self.progress = progress
+        settings = get_settings()
+        self.google_token = settings.get("Google", "token")
+        self.isbndb_token = settings.get("ISBNdb", "token")
+        self.google_url = settings.get("Google", "url")
+        self.isbndb_url = settings.get("ISBNdb", "url")
         self.google_header = ('&key='+self.google_token)
         self.isbndb_header = {'Authorization': self.isbndb_token}
+        self.cache = get_cache()
+        self.engine = get_engine()
         ### GUI dictionary :
         self.gui = gui
         ### Class parameters :
@@ -49,13 +46,17 @@ class Books: # pylint: disable=too-few-public-methods, too-many-instance-attribu
 
     def __get_isbndb_request(self, isbn):
         '''Get ISBNdb api request'''
-
-        Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
-        cache = os.path.join(current_dir, "cache", "scraper_cache")
-        requests_cache.install_cache(cache, backend='sqlite', expire_after=300)
+        response = self.cache.get(isbn, "isbndb")
+        if response is not None:
+            return response
 
         try:
-            response = req.get((self.isbndb_url+isbn), headers=self.isbndb_header)
+            request = self.engine.session("isbndb").get((self.isbndb_url+isbn),
+                headers=self.isbndb_header, timeout=self.engine.timeout("isbndb"))
+            response = request.json()
+            # Cached only when book was found, misses are asked again next time
+            if request.status_code == 200 and "book" in response:
+                self.cache.set(isbn, "isbndb", response)
 
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
@@ -64,282 +65,112 @@ class Books: # pylint: disable=too-few-public-methods, too-many-instance-attribu
 
     def __get_google_request(self, isbn):
         '''Get Google api request'''
-
-        Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
-        cache = os.path.join(current_dir, "cache", "scraper_cache")
-        requests_cache.install_cache(cache, backend='sqlite', expire_after=300)
+        response = self.cache.get(isbn, "google")
+        if response is not None:
+            return response
 
         try:
-            response = req.get(self.google_url+isbn+self.google_header)
+            request = self.engine.session("google").get(self.google_url+isbn+self.google_header,
+                timeout=self.engine.timeout("google"))
+            response = request.json()
+            if request.status_code == 200 and response.get("items"):
+                self.cache.set(isbn, "google", response)
 
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
 
         return response
 
-    def __get_isbndb_book(self): # pylint: disable=too-many-branches
+    def __get_scrapper(self, source, scrapper):
+        '''Get scrapper dictionary, cached only when book was found'''
+        response = self.cache.get(self.isbn, source)
+        if response is not None:
+            return response
+
+        response = scrapper(str(self.isbn))
+        if response and response.get("title"):
+            self.cache.set(self.isbn, source, response)
+
+        return response
+
+    def __collect(self, source, record):
+        '''Add record fields to lists of enabled boxes'''
+        for field, value in record.fields():
+            if not self.gui.get(field + "_box"):
+                continue
+            try:
+                if field == "categories":
+                    self.categories_list += value
+                else:
+                    getattr(self, field + "_list").append({source : value})
+            except Exception as error: # pylint: disable=broad-except
+                logger.info(error)
+
+    def __get_isbndb_book(self):
         '''Get Book from ISBNdb'''
         try:
-            # Request book
+            # Request book, decoded once
             isbndb_book_get = self.__get_isbndb_request(str(self.isbn))
-
-            # Title :
-            if self.gui["title_box"]:
-                try:
-                    self.title_list.append({"isbn" : isbndb_book_get.json()["book"]["title"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Author :
-            if self.gui["authors_box"]:
-                try:
-                    self.authors_list.append({"isbn" : list_expander(isbndb_book_get.json()["book"]["authors"])}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Binding :
-            if self.gui["binding_box"]:
-                try:
-                    self.binding_list.append({"isbn" : isbndb_book_get.json()["book"]["binding"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publisher :
-            if self.gui["publisher_box"]:
-                try:
-                    self.publisher_list.append({"isbn" : isbndb_book_get.json()["book"]["publisher"]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publish Date :
-            if self.gui["publish_date_box"]:
-                try:
-                    self.publish_date_list.append({"isbn" : isbndb_book_get.json()["book"]["date_published"][:4]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Categories :
-            if self.gui["categories_box"]:
-                try:
-                    self.categories_list += isbndb_book_get.json()["book"]["subjects"]
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
+            return BookRecord.from_isbndb(isbndb_book_get)
 
         except Exception as error: # pylint: disable=broad-except
             logger.warning(error)
+        return None
 
-    def __get_amazon_book(self): # pylint: disable=too-many-branches
+    def __get_amazon_book(self):
         '''Get Book from Amazon'''
         try:
             # Request book
-            amazon_book_get = amazon_scrapper(str(self.isbn))
-
-            # Title :
-            if self.gui["title_box"]:
-                try:
-                    self.title_list.append({"amazon" : amazon_book_get["title"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Author :
-            if self.gui["authors_box"]:
-                try:
-                    self.authors_list.append({"amazon" : amazon_book_get["author"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Description :
-            if self.gui["description_box"]:
-                try:
-                    self.description_list.append({"amazon" : amazon_book_get["description"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Binding :
-            if self.gui["binding_box"]:
-                try:
-                    self.binding_list.append({"amazon" : amazon_book_get["binding"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publisher :
-            if self.gui["publisher_box"]:
-                try:
-                    self.publisher_list.append({"amazon" : amazon_book_get["publisher"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publish Date :
-            if self.gui["publish_date_box"]:
-                try:
-                    self.publish_date_list.append({"amazon" : amazon_book_get["year"][:4]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Image :
-            if self.gui["image_box"]:
-                try:
-                    self.image_list.append({"amazon" : amazon_book_get["image"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Categories :
-            if self.gui["categories_box"]:
-                try:
-                    self.categories_list += amazon_book_get["categories"]
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
+            amazon_book_get = self.__get_scrapper("amazon", amazon_scrapper)
+            return BookRecord.from_scrapper(amazon_book_get)
 
         except Exception as error: # pylint: disable=broad-except
             logger.warning(error)
+        return None
 
-    def __get_goodreads_book(self): # pylint: disable=too-many-branches
+    def __get_goodreads_book(self):
         '''Get Book from goodreads'''
         try:
             # Request book
-            goodreads_book_get = goodreads_scrapper(str(self.isbn))
-
-            # Title :
-            if self.gui["title_box"]:
-                try:
-                    self.title_list.append({"goodreads" : goodreads_book_get["title"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Author :
-            if self.gui["authors_box"]:
-                try:
-                    self.authors_list.append({"goodreads" : goodreads_book_get["author"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Description :
-            if self.gui["description_box"]:
-                try:
-                    self.description_list.append({"goodreads" : goodreads_book_get["description"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Binding :
-            if self.gui["binding_box"]:
-                try:
-                    self.binding_list.append({"goodreads" : goodreads_book_get["binding"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publisher :
-            if self.gui["publisher_box"]:
-                try:
-                    self.publisher_list.append({"goodreads" : goodreads_book_get["publisher"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publish Date :
-            if self.gui["publish_date_box"]:
-                try:
-                    self.publish_date_list.append({"goodreads" : goodreads_book_get["year"][:4]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Image :
-            if self.gui["image_box"]:
-                try:
-                    self.image_list.append({"goodreads" : goodreads_book_get["image"]})
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Categories :
-            if self.gui["categories_box"]:
-                try:
-                    self.categories_list += goodreads_book_get["categories"]
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
+            goodreads_book_get = self.__get_scrapper("goodreads", goodreads_scrapper)
+            return BookRecord.from_scrapper(goodreads_book_get)
 
         except Exception as error: # pylint: disable=broad-except
             logger.warning(error)
+        return None
 
-    def __get_google_book(self): # pylint: disable=too-many-branches
+    def __get_google_book(self):
         '''Get Book from Google'''
         try:
-            # Request book
+            # Request book, decoded once
             google_book_get = self.__get_google_request(str(self.isbn))
-
-            # Title :
-            if self.gui["title_box"]:
-                try:
-                    self.title_list.append({"google" : google_book_get.json()["items"][0]["volumeInfo"]["title"]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Author :
-            if self.gui["authors_box"]:
-                try:
-                    self.authors_list.append({"google" : list_expander(google_book_get.json()["items"][0]["volumeInfo"]["authors"])}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Description :
-            if self.gui["description_box"]:
-                try:
-                    self.description_list.append({"google" : google_book_get.json()["items"][0]["volumeInfo"]["description"]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publisher :
-            if self.gui["publisher_box"]:
-                try:
-                    self.publisher_list.append({"google" : google_book_get.json()["items"][0]["volumeInfo"]["publisher"]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Publish Date :
-            if self.gui["publish_date_box"]:
-                try:
-                    self.publish_date_list.append({"google" : google_book_get.json()["items"][0]["volumeInfo"]["publishedDate"][:4]}) # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
-
-            # Categories :
-            if self.gui["categories_box"]:
-                try:
-                    self.categories_list += google_book_get.json()["items"][0]["volumeInfo"]["categories"] # pylint: disable=line-too-long
-                except Exception as error: # pylint: disable=broad-except
-                    logger.info(error)
+            return BookRecord.from_google(google_book_get)
 
         except Exception as error: # pylint: disable=broad-except
             logger.warning(error)
+        return None
 
     def get_book(self): # pylint: disable=too-many-locals
-        # Use threat :
         '''Get books properties'''
         try:
+            jobs = {}
             if self.gui["amazon"]:
-                data_thread_1 = Thread(target=self.__get_amazon_book)
-                data_thread_1.start()
+                jobs["amazon"] = self.__get_amazon_book
 
             if self.gui["goodreads"]:
-                data_thread_2 = Thread(target=self.__get_goodreads_book)
-                data_thread_2.start()
+                jobs["goodreads"] = self.__get_goodreads_book
 
             if self.gui["isbndb"]:
-                data_thread_3 = Thread(target=self.__get_isbndb_book)
-                data_thread_3.start()
+                jobs["isbndb"] = self.__get_isbndb_book
 
             if self.gui["google"]:
-                data_thread_4 = Thread(target=self.__get_google_book)
-                data_thread_4.start()
+                jobs["google"] = self.__get_google_book
 
-            if self.gui["amazon"]:
-                data_thread_1.join()
-
-            if self.gui["goodreads"]:
-                data_thread_2.join()
-
-            if self.gui["isbndb"]:
-                data_thread_3.join()
-
-            if self.gui["google"]:
-                data_thread_4.join()
+            # Run all sources on shared event loop, only records finished in time are used.
+            records = self.engine.run(jobs, self.progress)
+            for source, record in records.items():
+                if record is not None:
+                    self.__collect(SOURCE_LABELS.get(source, source), record)
 
             title = validator(self.title_list) # pylint: disable=unused-variable
             authors = validator(self.authors_list) # pylint: disable=unused-variable
@@ -369,93 +200,90 @@ class Books: # pylint: disable=too-few-public-methods, too-many-instance-attribu
 
         return dictionary
 
+class CategoryMatcher:
+    '''Category mapper compiled once, reused for every book'''
+    def __init__(self, settings):
+        self.category_dict = settings.mapper
+        self.discard_list = settings.discard
+        self.threshold = settings.threshold
+        self.synonyms = []
+        self.exact = {}
+
+        # Index synonyms, exact ones are matched without scoring.
+        for category, mapper_list in self.category_dict.items():
+            for synonym in mapper_list:
+                self.synonyms.append((synonym, category))
+                self.exact.setdefault(synonym, []).append(category)
+
+    def candidates(self, similarity_list):
+        '''Split categories from sources into unique words and phrases'''
+        separate_1 = []
+        separate_2 = []
+
+        # Remove double-dash and make it lower.
+        for category in similarity_list:
+            separate_1 += category.lower().split('--')
+
+        # Remove single whitespace.
+        for separated_category in separate_1:
+            separate_2 += (separated_category.replace(",", "")).split(' ')
+
+        # Remove empty entry from list.
+        separate_2 = [word for word in separate_2 if word not in self.discard_list]
+
+        # Make some alternatives.
+        separate_3 = [word + sign + loop_word for word in separate_2
+                      for sign in (' ', ' & ') for loop_word in separate_2]
+
+        # Concatenate splitted lists with category.
+        return list(dict.fromkeys([*similarity_list, *separate_2, *separate_3]))
+
+    def match(self, similarity_list):
+        '''Find categories similar to any candidate'''
+        to_fuzz = self.candidates(similarity_list)
+        found = set()
+
+        # Exact synonyms first.
+        if self.threshold < 100:
+            for candidate in to_fuzz:
+                found.update(self.exact.get(candidate, ()))
+
+        # Score rest of synonyms in one batch per candidate, skip categories already found.
+        choices = [synonym for synonym, category in self.synonyms if category not in found]
+        owners = [category for synonym, category in self.synonyms if category not in found]
+        for candidate in to_fuzz:
+            if not choices:
+                break
+            matches = process.extract(candidate, choices, scorer=fuzz.ratio,
+                                      score_cutoff=self.threshold, limit=None)
+            matched = {owners[index] for synonym, score, index in matches
+                       if int(round(score)) > self.threshold}
+            if matched:
+                found |= matched
+                choices = [synonym for synonym, owner in zip(choices, owners) if owner not in found]
+                owners = [owner for owner in owners if owner not in found]
+
+        return [category for category in self.category_dict if category in found]
+
+_matcher = None
+
+def get_matcher():
+    '''Get compiled matcher, rebuilt only when settings are reloaded'''
+    global _matcher # pylint: disable=global-statement
+    settings = get_settings()
+    if _matcher is None or _matcher[0] is not settings:
+        _matcher = (settings, CategoryMatcher(settings))
+    return _matcher[1]
+
 class Fuzzer:
     '''Fuzzer class'''
     def __init__(self, similarity_list):
         self.similarity_list = similarity_list
-        self.category_dict = {}
-
-        # Load ini variables.
-        try:
-            self.config = configparser.ConfigParser()
-            self.config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-            self.main_list = ast.literal_eval(self.config.get("Category", "categories"))
-            self.discard_list = ast.literal_eval(self.config.get("Validator", "discard"))
-            self.threshold = self.config.get("Category", "threshold")
-
-        except Exception as error: # pylint: disable=broad-except
-            logger.info(error)
-
-    def __mapper(self):
-        '''Map category'''
-        self.config.read(os.path.join(os.path.dirname(__file__), 'config', 'category.ini'))
-
-        for category in self.main_list:
-            try:
-                mapper_list = ast.literal_eval(self.config.get("Mapper", category))
-                if isinstance(mapper_list, str):
-                    raise TypeError('Type error, rise exception')
-
-                # Find mapping.
-                mapper_list = [mapping.lower() for mapping in mapper_list]
-                mapper_list.append(category.lower())
-                self.category_dict[category] = mapper_list
-
-            # Add category as value and key if no mapping found.
-            except configparser.NoOptionError as error: # pylint: disable=unused-variable
-                self.category_dict[category] = [category.lower()]
-            # Add category as value and key if error raised.
-            except TypeError as error: # pylint: disable=unused-variable
-                self.category_dict[category] = [category.lower()]
-
-        return self.category_dict
 
     def fuzz(self):
         '''Find on lists similar objects'''
-
-        def add_word(loop_word):
-            '''Concatenate category'''
-            return word.lower() + ' ' + loop_word.lower() # pylint: disable=undefined-loop-variable
-
-        def add_sign(loop_word):
-            '''Concatenate category'''
-            return word.lower() + ' & ' + loop_word.lower() # pylint: disable=undefined-loop-variable
-
         try:
-            # Invoke mapper function.
-            main_dict = self.__mapper()
-            separate_1 = []
-            separate_2 = []
-            separate_3 = []
-
-            # Remove double-dash.
-            for category in self.similarity_list:
-                separate_1 += category.split('--')
-
-            # Make it lower.
-            separate_1 = [separate_1_category.lower() for separate_1_category in separate_1]
-
-            # Remove single whitespace.
-            for separated_category in separate_1:
-                separate_2 += (separated_category.replace(",", "")).split(' ')
-
-            # Make it lower.
-            separate_2 = [separate_2_category.lower() for separate_2_category in separate_2]
-
-            # Remove empty entry from list.
-            for discard in self.discard_list:
-                while discard in separate_2: separate_2.remove(discard) # pylint: disable=multiple-statements
-
-            # Make some alternatives.
-            for word in separate_2:
-                separate_3 += map(add_word, separate_2)
-                separate_3 += map(add_sign, separate_2)
-
-            # Concatenate splitted lists with category.
-            to_fuzz = [*self.similarity_list, *separate_2, *separate_3]
-
-            return [key for key, value in main_dict.items()
-                    for x in value for y in to_fuzz if fuzz.ratio(x,y) > int(self.threshold)]
+            return get_matcher().match(self.similarity_list)
 
         except Exception as error: # pylint: disable=broad-except
             print(error)
@@ -463,10 +291,9 @@ class Fuzzer:
 
 def validator(validation_list): # pylint: disable=too-many-branches, too-many-return-statements
     '''Clear lists of unwanted objects and choose the right one'''
-    config = configparser.ConfigParser()
-    config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-    discard_list = ast.literal_eval(config.get("Validator", "discard"))
-    priority = config.get("Validator", "priority")
+    settings = get_settings()
+    discard_list = settings.discard
+    priority = settings.priority
     source_list = [list(source.values())[0] for source in validation_list]
 
     try:
@@ -523,18 +350,6 @@ def validator(validation_list): # pylint: disable=too-many-branches, too-many-re
     except Exception as error: # pylint: disable=broad-except
         logger.info(error)
 
-def list_expander(expander_list):
-    '''Expand list elements to string'''
-    try:
-        if len(expander_list) > 1:
-            return ', '.join(expander_list)
-        if len(expander_list) == 1:
-            return expander_list[0]
-        return None
-
-    except Exception as error: # pylint: disable=broad-except
-        logger.info(error)
-
 def get_greater_string(validation_list):
     '''Get greater string'''
     validation_dictionary = {}
@@ -551,11 +366,11 @@ def find_html(string):
     result = re.search(pattern, string)
     return result
 
-def main(isbn, gui):
+def main(isbn, gui, progress=None):
     '''Main function'''
     # Send dictionary with boxes from gui to class ->
 
-    book = Books(isbn=isbn, gui = gui)
+    book = Books(isbn=isbn, gui = gui, progress=progress)
     request = book.get_book()
 
     return request
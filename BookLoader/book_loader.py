@@ -1,6 +1,4 @@
 '''Gui''' # pylint: disable=(invalid-name)
-import ast  # Use to read list from config file.
-import configparser  # Read config file.
 import csv
 import io
 import json
@@ -13,7 +11,6 @@ import sys
 import time
 import traceback
 import webbrowser
-from distutils import util
 from queue import Queue  # Report result from threads
 from threading import Thread
 
@@ -21,6 +18,7 @@ from PIL import Image
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from book import find_html
+from configuration import get_settings
 from book import main as book_mode
 from image_downloader import get_image
 from private.gui_book_updater import Ui_MainWindow
@@ -29,6 +27,7 @@ from woo import get_product as woo_get
 from woo import main as woo
 
 current_dir = (os.path.dirname(os.path.realpath(__file__)))
+pathlib.Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
 logging_path = os.path.join(current_dir, "logs", "gui.log")
 
 logging.basicConfig(filename=logging_path, level=logging.WARNING,
@@ -73,6 +72,23 @@ class Worker(QtCore.QRunnable): # pylint: disable=(c-extension-no-member)
         finally:
             self.signals.finished.emit()  # Done
 
+def merge_image_list(images):
+    '''Merge image links of all sources, without duplicates and empty links'''
+    image_list = []
+    for dictionary in images or []:
+        for links in dictionary.values():
+            image_list += [link for link in links or [] if link]
+    return list(dict.fromkeys(image_list))
+
+def load_cover(url, isbn, progress_callback): # pylint: disable=(unused-argument)
+    '''Download and decode cover off the UI thread, QPixmap is made on UI thread'''
+    path = get_image(url, isbn)
+    if path is None:
+        return isbn, url, None, None, None
+    with Image.open(path) as image:
+        size = image.size
+    return isbn, url, path, QtGui.QImage(path), size # pylint: disable=(c-extension-no-member)
+
 class Completer(QtWidgets.QCompleter): # pylint: disable=(c-extension-no-member)
     '''Category Completer'''
     def __init__(self, *args, **kwargs):
@@ -99,6 +115,11 @@ class Completer(QtWidgets.QCompleter): # pylint: disable=(c-extension-no-member)
 
 class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-extension-no-member)
     ''' Initialize Gui '''
+    # Cover links found by lookup thread, prefetch is started on UI thread
+    covers_found = QtCore.pyqtSignal(str, list) # pylint: disable=(c-extension-no-member)
+    # ISBN and name of source which finished lookup
+    source_done = QtCore.pyqtSignal(str, str) # pylint: disable=(c-extension-no-member)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -111,6 +132,13 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         self.setupUi(self)
         # self.setMaximumSize(QtCore.QSize(self.rect.width(),self.rect.height()))
         self.threadpool = QtCore.QThreadPool() # pylint: disable=(c-extension-no-member)
+        self.cover_pool = QtCore.QThreadPool() # pylint: disable=(c-extension-no-member)
+        self.cover_pool.setMaxThreadCount(8)
+        self.covers = {}
+        self.cover_requests = set()
+        self.covers_found.connect(self.prefetch_covers)
+        self.sources_done = set()
+        self.source_done.connect(self.source_finished)
         self.percent_size_line = 0.035
         self.percent_size_label = 0.027
 
@@ -172,14 +200,13 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         self.word_press_button.setMaximumHeight(int(self.rect.height()*0.12))
         self.update_info_label.setMaximumHeight(int(self.rect.height()*self.percent_size_line))
 
-        self.config = configparser.ConfigParser()
-        self.config.read(os.path.join(os.path.dirname(__file__),'config', 'conf.ini'))
+        sources = get_settings().sources
 
         self.gui = {
-            'google'            :util.strtobool(self.config.get('Source', 'google')),
-            'isbndb'            :util.strtobool(self.config.get('Source', 'isbndb')),
-            'amazon'            :util.strtobool(self.config.get('Source', 'amazon')),
-            'goodreads'         :util.strtobool(self.config.get('Source', 'goodreads')),
+            'google'            :sources['google'],
+            'isbndb'            :sources['isbndb'],
+            'amazon'            :sources['amazon'],
+            'goodreads'         :sources['goodreads'],
             'title_box'         :True,
             'authors_box'       :True,
             'description_box'   :True,
@@ -366,25 +393,29 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
     def progress_fn(self):
         ''' Progress bar method'''
         try:
+            self.sources_done = set()
             self.progress_bar.setValue(0)
-            QtCore.QCoreApplication.processEvents() # pylint: disable=(c-extension-no-member)
             self.msg_box.setWindowTitle('Pobieranie danych')
             self.msg_box.setWindowIcon(QtGui.QIcon(os.path.join(self.current_dir, "private", "image", "bookloader.png"))) # pylint: disable=(c-extension-no-member),(line-too-long)
             self.msg_box.setText('Pobieranie danych')
             self.msg_box.show()
-            QtCore.QCoreApplication.processEvents() # pylint: disable=(c-extension-no-member)
-            for i in range(101):
-                if self.name_line.toPlainText() == '':
-                    QtCore.QCoreApplication.processEvents() # pylint: disable=(c-extension-no-member)
-                    time.sleep(0.05)
-                    self.progress_bar.setValue(i)
-                else:
-                    i = 100
-                    self.progress_bar.setValue(i)
         except Exception as error:  # pylint: disable=broad-except
             print("Progress fn: ",error)
             logger.info(error)
 
+    def source_finished(self, isbn, source):
+        ''' Move progress bar when source finished '''
+        try:
+            if isbn != self.item:
+                return
+            self.sources_done.add(source)
+            # Enabled book sources and WooCommerce
+            total = sum(1 for key in ('google', 'isbndb', 'amazon', 'goodreads') if self.gui[key]) + 1 # pylint: disable=(line-too-long)
+            self.progress_bar.setValue(min(100, int(100 * len(self.sources_done) / total)))
+        except Exception as error:  # pylint: disable=broad-except
+            print("Source finished: ",error)
+            logger.info(error)
+
     def isbn_run(self):
         ''' Automatic run for ISBN edit line '''
         try:
@@ -400,6 +431,9 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         try:
             self.update_info_label.clear()
             self.item = self.isbn_line.text() # pylint: disable=(attribute-defined-outside-init)
+            self.gui.update(get_settings().sources) # Sources could change in settings
+            self.covers = {}
+            self.cover_requests = set()
             worker = Worker(self.search_item)
 
             worker.signals.finished.connect(self.get_source)
@@ -432,7 +466,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         ''' Search item in book '''
         book_start = time.time()
         try:
-            self.dictionary_book = book_mode(self.item, self.gui) # pylint: disable=(attribute-defined-outside-init)
+            isbn = self.item
+            self.dictionary_book = book_mode(isbn, self.gui, progress=lambda source: self.source_done.emit(isbn, source)) # pylint: disable=(attribute-defined-outside-init),(line-too-long)
+            if self.dictionary_book:
+                self.covers_found.emit(self.item, merge_image_list(self.dictionary_book.get('image'))) # pylint: disable=(line-too-long)
         except Exception as error:  # pylint: disable=broad-except
             print("Search item book: ",error)
             logger.info(error)
@@ -446,9 +483,12 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
 
         self.gui['name'] = True
         try:
-            self.dictionary_woo = woo_get(self.item, self.gui) # pylint: disable=(attribute-defined-outside-init)
+            isbn = self.item
+            self.dictionary_woo = woo_get(isbn, self.gui, progress=lambda source: self.source_done.emit(isbn, source)) # pylint: disable=(attribute-defined-outside-init),(line-too-long)
             if not self.dictionary_woo :
                 self.dictionary_woo = None # pylint: disable=(attribute-defined-outside-init)
+            elif self.dictionary_woo.get('image'):
+                self.covers_found.emit(self.item, [self.dictionary_woo['image']])
         except Exception as error:  # pylint: disable=broad-except
             print("Search item woo: ",error)
             logger.info(error)
@@ -460,6 +500,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
     def get_source(self):
         ''' Compere lists from Book and Woocommerce '''
         try:
+            self.progress_bar.setValue(100)
             if self.dictionary_woo is None:
                 self.dictionary = self.dictionary_book # pylint: disable=(attribute-defined-outside-init)
                 self.dictionary['source'] = False
@@ -494,12 +535,9 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
             print("Put Dict 1:",error)
             logger.info(error)
 
-        try:
-            self.dictionary["image"] = get_image(self.image_list[0], self.item)
-        except Exception as error:  # pylint: disable=broad-except
-            print(error)
-            print("Put Dict image list :",error)
-            self.dictionary["image"] = None
+        # Cover is set by show_cover when its download is finished
+        self.dictionary["image"] = None
+        self.dictionary["image_src"] = None
 
         # Convert binding to Polish names
         try:
@@ -554,10 +592,8 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
 
         # Show image
         try:
-            if self.dictionary['image']:
-                self.cover_image_label.setPixmap(QtGui.QPixmap(self.dictionary['image'])) # pylint: disable=(c-extension-no-member)
-                im = Image.open(self.dictionary["image"])
-                self.image_size_label.setText(str(im.size))
+            self.prefetch_covers(self.item, self.image_list)
+            self.show_cover()
         except Exception as error: # pylint: disable=broad-except
             print("Put Dict - show image: ",error)
             logger.info(error)
@@ -621,6 +657,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
                 'publisher' : self.publisher_line.text(),
                 'publish_date' : self.year_line.text(),
                 'image': self.dictionary['image'],
+                'image_src': self.dictionary.get('image_src'),
                 'categories' : self.category_to_save,
                 'price' : self.price_line.text(),
                 'amount' : self.amount_line.text(),
@@ -678,20 +715,49 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
     def get_image_list(self):
         """ Merge image list """
         try:
-            for dictionary in self.dictionary['image']:
-                for links in dictionary.values():
-                    self.image_list += links
-
-            for link in self.image_list:
-                if link is None:
-                    self.image_list.remove(link)
-
-            self.image_list = list(set(self.image_list))
+            self.image_list = merge_image_list(self.dictionary['image'])
             print(self.image_list)
         except Exception as error:  # pylint: disable=broad-except
             print(error)
             logger.info(error)
 
+    def prefetch_covers(self, isbn, urls):
+        """ Download and decode covers in background """
+        for url in urls:
+            if (isbn, url) in self.cover_requests:
+                continue
+            self.cover_requests.add((isbn, url))
+            worker = Worker(load_cover, url, isbn)
+            worker.signals.result.connect(self.cover_loaded)
+            self.cover_pool.start(worker)
+
+    def cover_loaded(self, result):
+        """ Keep decoded cover, show it if it is current one """
+        isbn, url, path, image, size = result
+        if isbn != self.item:
+            return
+        pixmap = QtGui.QPixmap.fromImage(image) if image is not None else None # pylint: disable=(c-extension-no-member)
+        self.covers[url] = (path, pixmap, size)
+        if self.image_list and self.image_list[self.image_iterator] == url:
+            self.show_cover()
+
+    def show_cover(self):
+        """ Show current cover if downloaded """
+        try:
+            url = self.image_list[self.image_iterator]
+            path, pixmap, size = self.covers.get(url, (None, None, None))
+            self.dictionary["image"] = path
+            self.dictionary["image_src"] = url if path else None
+            if pixmap is None:
+                self.cover_image_label.clear()
+                self.image_size_label.clear()
+                return
+            self.cover_image_label.setPixmap(pixmap)
+            self.image_size_label.setText(str(size))
+        except Exception as error:  # pylint: disable=broad-except
+            print(error)
+            logger.info(error)
+
     def next_image(self):
         """ Next image from list """
         try:
@@ -700,10 +766,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
                 if len(self.image_list) == self.image_iterator:
                     self.image_iterator = 0
 
-                self.dictionary["image"] = get_image(self.image_list[self.image_iterator], self.item) # pylint: disable=(line-too-long)
-                im = Image.open(self.dictionary["image"])
-                self.image_size_label.setText(str(im.size))
-                self.cover_image_label.setPixmap(QtGui.QPixmap(self.dictionary['image'])) # pylint: disable=(c-extension-no-member)
+                self.show_cover()
         except Exception as error:  # pylint: disable=broad-except
             print(error)
             logger.info(error)
@@ -716,10 +779,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
                 if self.image_iterator == -1:
                     self.image_iterator = len(self.image_list) -1
 
-                self.dictionary["image"] = get_image(self.image_list[self.image_iterator], self.item) # pylint: disable=(line-too-long)
-                im = Image.open(self.dictionary["image"])
-                self.image_size_label.setText(str(im.size))
-                self.cover_image_label.setPixmap(QtGui.QPixmap(self.dictionary['image'])) # pylint: disable=(c-extension-no-member)
+                self.show_cover()
         except Exception as error:  # pylint: disable=broad-except
             print(error)
             logger.info(error)
@@ -727,7 +787,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
     def change_image(self):
         ''' Change image button method '''
         try:
-            image_folder = self.config.get("General", "image_folder")
+            image_folder = get_settings().image_folder
             image_path = os.path.join(self.current_dir, image_folder)
             image = os.path.join(image_path, str(self.item)+".jpg")
 
@@ -740,6 +800,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
                 print(error)
                 logger.info(error)
             self.dictionary['image'] = image
+            self.dictionary['image_src'] = None
             im = Image.open(self.dictionary["image"])
             self.image_size_label.setText(str(im.size))
             self.cover_image_label.setPixmap(QtGui.QPixmap(self.dictionary['image'])) # pylint: disable=(c-extension-no-member)
@@ -831,15 +892,14 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         self.settings_ui = Ui_Settings() # pylint: disable=(attribute-defined-outside-init)
         self.settings_ui.setupUi(self.settings_window)
 
-        # Set Parser for config.ini
-        config = configparser.ConfigParser()
-        config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-        self.settings_ui.isbndb_check_box.setChecked(util.strtobool(config.get('Source', 'isbndb')))
-        self.settings_ui.google_check_box.setChecked(util.strtobool(config.get('Source', 'google')))
-        self.settings_ui.amazon_check_box.setChecked(util.strtobool(config.get('Source', 'amazon')))
-        self.settings_ui.goodreads_check_box.setChecked(util.strtobool(config.get('Source', 'goodreads'))) # pylint: disable=(line-too-long)
+        # Set loaded settings
+        settings = get_settings()
+        self.settings_ui.isbndb_check_box.setChecked(settings.sources['isbndb'])
+        self.settings_ui.google_check_box.setChecked(settings.sources['google'])
+        self.settings_ui.amazon_check_box.setChecked(settings.sources['amazon'])
+        self.settings_ui.goodreads_check_box.setChecked(settings.sources['goodreads'])
         for radio in self.settings_ui.list_of_radio:
-            if config.get('Validator', 'priority') in radio.text().lower():
+            if settings.priority in radio.text().lower():
                 radio.setChecked(True)
         self.settings_window.show()
 
@@ -847,9 +907,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
     def categories_main_list(self):
         ''' Category list '''
         try:
-            config = configparser.ConfigParser()
-            config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-            self.category_completer_list = ast.literal_eval(config.get("Category", "categories"))
+            self.category_completer_list = list(get_settings().categories)
         except Exception as error:  # pylint: disable=broad-except
             print(error)
             logger.info(error)
@@ -883,9 +941,6 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow): # pylint: disable=(c-e
         if reply == QtWidgets.QMessageBox.Yes: # pylint: disable=(c-extension-no-member)
             event.accept()
             print('Window closed')
-            cache = pathlib.Path(os.path.join(self.current_dir, "cache"))
-            if cache.exists() and cache.is_dir():
-                shutil.rmtree(cache)
         else:
             event.ignore()
 
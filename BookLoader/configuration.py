@@ -0,0 +1,111 @@
+'''Settings loaded once from config files'''
+import ast  # Use to read list from config file.
+import configparser  # Read config file.
+import logging  # Logging errors.
+import os  # Just os module?
+import threading  # Share settings between threads.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+LOGS_DIR = os.path.join(current_dir, "logs")
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+def get_logger(name, filename, level=logging.WARNING):
+    '''Logger of module writing to its own file in logs folder
+
+    Root logger is left to entry points, basicConfig of first imported module would
+    otherwise send logs of every module to its file.
+    '''
+    module_logger = logging.getLogger(name)
+    path = os.path.join(LOGS_DIR, filename)
+    if not any(getattr(handler, "baseFilename", None) == path for handler in module_logger.handlers):
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        handler = logging.FileHandler(path, delay=True)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        module_logger.addHandler(handler)
+        module_logger.setLevel(level)
+        module_logger.propagate = False
+    return module_logger
+
+logger=get_logger(__name__, "config.log")
+
+CONF_PATH = os.path.join(current_dir, 'config', 'conf.ini')
+CATEGORY_PATH = os.path.join(current_dir, 'config', 'category.ini')
+
+class Settings: # pylint: disable=too-many-instance-attributes
+    '''conf.ini and category.ini parsed into typed values'''
+    def __init__(self):
+        '''init Settings class'''
+        self.config = configparser.ConfigParser()
+        self.config.read(CONF_PATH)
+        self.category_config = configparser.ConfigParser()
+        self.category_config.read(CATEGORY_PATH)
+
+        self.image_folder = self.get("General", "image_folder", fallback="img")
+        self.priority = self.get("Validator", "priority", fallback="amazon")
+        self.discard = self.literal("Validator", "discard", [None, ""])
+        self.categories = self.literal("Category", "categories", [])
+        self.threshold = self.getint("Category", "threshold", fallback=90)
+        self.sources = {source: self.getboolean("Source", source, fallback=False)
+                        for source in ("isbndb", "google", "amazon", "goodreads")}
+        self.mapper = self.__mapper()
+
+    def get(self, section, option, **kwargs):
+        '''Get string value'''
+        return self.config.get(section, option, **kwargs)
+
+    def getint(self, section, option, **kwargs):
+        '''Get integer value'''
+        return self.config.getint(section, option, **kwargs)
+
+    def getfloat(self, section, option, **kwargs):
+        '''Get float value'''
+        return self.config.getfloat(section, option, **kwargs)
+
+    def getboolean(self, section, option, **kwargs):
+        '''Get boolean value'''
+        return self.config.getboolean(section, option, **kwargs)
+
+    def literal(self, section, option, fallback=None):
+        '''Get python literal (list) value'''
+        try:
+            return ast.literal_eval(self.config.get(section, option))
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+        return fallback
+
+    def __mapper(self):
+        '''Map category to its lowercase synonyms'''
+        category_dict = {}
+        for category in self.categories:
+            try:
+                mapper_list = ast.literal_eval(self.category_config.get("Mapper", category))
+                if isinstance(mapper_list, str):
+                    raise TypeError('Type error, rise exception')
+
+                # Find mapping.
+                mapper_list = [mapping.lower() for mapping in mapper_list]
+                mapper_list.append(category.lower())
+                category_dict[category] = mapper_list
+
+            # Add category as value and key if no mapping found.
+            except (configparser.Error, TypeError, ValueError, SyntaxError) as error: # pylint: disable=unused-variable
+                category_dict[category] = [category.lower()]
+
+        return category_dict
+
+_settings = None
+_settings_lock = threading.Lock()
+
+def get_settings():
+    '''Get process wide settings'''
+    global _settings # pylint: disable=global-statement
+    with _settings_lock:
+        if _settings is None:
+            _settings = Settings()
+        return _settings
+
+def reload_settings():
+    '''Drop loaded settings, next get_settings reads files again'''
+    global _settings # pylint: disable=global-statement
+    with _settings_lock:
+        _settings = None
@@ -1,73 +1,142 @@
 '''MySQL connector'''
-import configparser  # Read config file.
 import logging  # Logging errors.
-import os  # Just os module?
-from pathlib import Path  # Create a directory if needed.
+import threading  # Share pool between threads.
+from contextlib import contextmanager  # Pooled connection in with block.
 
-import mysql.connector
-from mysql.connector import errorcode
+from mysql.connector import errorcode, pooling
 
-current_dir = (os.path.dirname(os.path.realpath(__file__)))
+from configuration import get_logger, get_settings  # Settings loaded once.
 
 # Start logging.
-Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
-logging_path = os.path.join(current_dir, "logs", "sql.log")
-logging.basicConfig(filename=logging_path, level=logging.WARNING,
-                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
-logger=logging.getLogger(__name__)
+logger=get_logger(__name__, "sql.log", logging.WARNING)
+
+# Number of SKUs sent in one query.
+BULK_SIZE = 1000
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    '''Get process wide connection pool, rebuilt when settings are reloaded'''
+    global _pool, _pool_slots # pylint: disable=global-statement
+    settings = get_settings()
+    with _pool_lock:
+        if _pool is None or _pool[0] is not settings:
+            pool_size = settings.getint("MySQL", "pool_size", fallback=5)
+            pool = pooling.MySQLConnectionPool(
+                pool_name = "bookloader",
+                pool_size = pool_size,
+                pool_reset_session = True,
+                host = settings.get("MySQL", "host"),
+                user = settings.get("MySQL", "user"),
+                password = settings.get("MySQL", "password"),
+                database = settings.get("MySQL", "database"))
+            _pool = (settings, pool)
+            # Pool raises when empty, so callers wait for free slot instead.
+            _pool_slots = threading.BoundedSemaphore(pool_size)
+    return _pool[1], _pool_slots
 
 class MySQL: # pylint: disable=too-few-public-methods
-    '''Woo class'''
+    '''MySQL class'''
 
-    def __init__(self, isbn):
+    def __init__(self, isbn=None):
         '''init MySQL class'''
-        # Import configuration.
-        config = configparser.ConfigParser()
-        config.read(os.path.join(current_dir, 'config', 'conf.ini'))
-        self.host = config.get("MySQL", "host")
-        self.user = config.get("MySQL", "user")
-        self.password = config.get("MySQL", "password")
-        self.database = config.get("MySQL", "database")
         self.isbn = isbn
 
-    def db_mysql(self):
-        '''MySQL function'''
-
-        query  = ("SELECT * FROM `wp_postmeta` WHERE meta_key = '_sku' AND meta_value = {}").format(self.isbn) # pylint: disable=line-too-long
-
+    @staticmethod
+    @contextmanager
+    def __connection():
+        '''Pooled connection checked for health, waits for free pool slot'''
+        pool, slots = get_pool()
+        with slots:
+            cnx = pool.get_connection()
+            try:
+                # Health check, reconnect if server dropped idle connection.
+                cnx.ping(reconnect=True, attempts=2, delay=0)
+                yield cnx
+            finally:
+                # Return connection to pool.
+                cnx.close()
+
+    @staticmethod
+    def __query(query, params, silent=True):
+        '''Run prepared query on pooled connection, errors are raised only if not silent'''
         try:
-            cnx = mysql.connector.connect(
-                host = self.host,
-                user = self.user,
-                password = self.password,
-                database = self.database)
+            with MySQL.__connection() as cnx:
+                cursor = cnx.cursor(prepared=True)
+                try:
+                    cursor.execute(query, params)
+                    return cursor.fetchall()
+                finally:
+                    cursor.close()
+
+        except Exception as error: # pylint: disable=broad-except
+            report(error)
+            if not silent:
+                raise
+            return []
 
-            cursor = cnx.cursor()
+    def db_mysql(self):
+        '''Get post_id of product with ISBN as SKU'''
+        query = ("SELECT post_id FROM `wp_postmeta` WHERE meta_key = '_sku' AND meta_value = %s LIMIT 1") # pylint: disable=line-too-long
 
-        except mysql.connector.Error as error:
-            if error.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
-                logger.info(error)
+        result = self.__query(query, (str(self.isbn),))
+        if not result:
+            return None
 
-            elif error.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
-                logger.info(error)
+        return result[0][0]
 
-            else:
-                logger.info(error)
-                print(error)
+    def db_mysql_bulk(self, isbns):
+        '''Get {sku: post_id} for many ISBNs, one query per BULK_SIZE on one pooled connection'''
+        isbns = list(dict.fromkeys(str(isbn) for isbn in isbns))
+        dictionary = {}
+        if not isbns:
+            return dictionary
 
         try:
-            cursor.execute(query)
-            result = cursor.fetchall()
-            if not result:
-                return None
-
-            return result[0][1]
+            with self.__connection() as cnx:
+                cursor = cnx.cursor(prepared=True)
+                try:
+                    for start in range(0, len(isbns), BULK_SIZE):
+                        chunk = isbns[start:start + BULK_SIZE]
+                        query = ("SELECT meta_value, post_id FROM `wp_postmeta` WHERE meta_key = '_sku' AND meta_value IN ({})").format(", ".join(["%s"] * len(chunk))) # pylint: disable=line-too-long
+                        cursor.execute(query, tuple(chunk))
+                        for sku, post_id in cursor.fetchall():
+                            dictionary.setdefault(decode(sku), post_id)
+                finally:
+                    cursor.close()
 
         except Exception as error: # pylint: disable=broad-except
-            logger.info(error)
-
-        finally:
-            cursor.close()
-            cnx.close()
+            report(error)
+
+        return dictionary
+
+    def db_mysql_skus(self, modified_after=None):
+        '''Get (sku, post_id, post_status, post_modified_gmt) of products modified since date, raises on error'''
+        query = ("SELECT pm.meta_value, pm.post_id, p.post_status, p.post_modified_gmt FROM `wp_postmeta` pm " # pylint: disable=line-too-long
+                 "JOIN `wp_posts` p ON p.ID = pm.post_id "
+                 "WHERE pm.meta_key = '_sku' AND pm.meta_value <> '' AND p.post_modified_gmt >= %s")
+
+        rows = []
+        for sku, post_id, status, modified in self.__query(query, (modified_after or "1970-01-01 00:00:00",), silent=False): # pylint: disable=line-too-long
+            rows.append((decode(sku), post_id, decode(status), modified))
+        return rows
+
+def report(error):
+    '''Print hint for common connection errors and log error'''
+    if getattr(error, "errno", None) == errorcode.ER_ACCESS_DENIED_ERROR:
+        print("Something is wrong with your user name or password")
+    elif getattr(error, "errno", None) == errorcode.ER_BAD_DB_ERROR:
+        print("Database does not exist")
+    logger.info(error)
+
+def decode(value):
+    '''Prepared cursor can return text columns as bytes'''
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    return value
+
+def get_post_ids(isbns):
+    '''Resolve many ISBNs to post_ids in bulk'''
+    return MySQL().db_mysql_bulk(isbns)
@@ -0,0 +1,114 @@
+'''Source fan-out engine'''
+import asyncio  # Event loop.
+import logging  # Logging errors.
+import threading  # Event loop thread.
+from concurrent.futures import ThreadPoolExecutor  # Bounded pool for blocking sources.
+
+import requests  # Requests HTTP Library.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+from http_cache import ConditionalAdapter  # Revalidate known responses.
+
+logger=get_logger(__name__, "engine.log", logging.WARNING)
+
+SOURCES = ('amazon', 'goodreads', 'isbndb', 'google')
+
+class Engine:
+    '''One event loop shared by every Books lookup in process'''
+    def __init__(self):
+        '''init Engine class'''
+        settings = get_settings()
+        self.workers = settings.getint('Engine', 'workers', fallback=16)
+        self.pool_size = settings.getint('Engine', 'pool_size', fallback=10)
+        self.limits = {source: settings.getint('Engine', source + '_limit', fallback=4)
+                       for source in SOURCES}
+        self.timeouts = {source: settings.getfloat('Engine', source + '_timeout', fallback=60)
+                         for source in SOURCES}
+
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='source')
+        self.semaphores = {}
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, name='engine', daemon=True)
+        self.thread.start()
+
+    def session(self, host):
+        '''Get keep-alive session shared by all requests to host'''
+        with self.sessions_lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                adapter = ConditionalAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+        return self.sessions[host]
+
+    def timeout(self, source):
+        '''Get timeout of source'''
+        return self.timeouts.get(source, 60)
+
+    async def __run_source(self, source, function, progress, results):
+        '''Run blocking source under its concurrency limit and timeout, report its end
+
+        Result is kept only when source finished in time. Timed out thread keeps running
+        and holds its slot until it ends.
+        '''
+        # Semaphores are created on loop thread only.
+        if source not in self.semaphores:
+            self.semaphores[source] = asyncio.Semaphore(self.limits.get(source, 4))
+        semaphore = self.semaphores[source]
+
+        try:
+            await semaphore.acquire()
+            try:
+                future = self.executor.submit(function)
+            except Exception:
+                semaphore.release()
+                raise
+            # Runs when thread ends or queued job is cancelled, not when waiting stops
+            future.add_done_callback(lambda _: self.loop.call_soon_threadsafe(semaphore.release))
+            results[source] = await asyncio.wait_for(asyncio.wrap_future(future, loop=self.loop),
+                                                     self.timeout(source))
+
+        except asyncio.TimeoutError:
+            logger.warning("%s source timed out", source)
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.warning(error)
+
+        if progress is not None:
+            try:
+                progress(source)
+            except Exception as error: # pylint: disable=broad-except
+                logger.warning(error)
+
+    async def __gather(self, jobs, progress):
+        '''Run all sources at once'''
+        results = {}
+        await asyncio.gather(*(self.__run_source(source, function, progress, results)
+                               for source, function in jobs.items()))
+        return results
+
+    def run(self, jobs, progress=None):
+        '''Run {source: function} jobs on shared loop and wait for all of them
+
+        Returns {source: result} of jobs finished in time without error.
+        progress(source) is called from loop thread as soon as each source is finished.
+        '''
+        future = asyncio.run_coroutine_threadsafe(self.__gather(jobs, progress), self.loop)
+        return future.result()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    '''Get process wide engine, rebuilt when settings are reloaded, old one finishes its work'''
+    global _engine # pylint: disable=global-statement
+    settings = get_settings()
+    with _engine_lock:
+        if _engine is None or _engine[0] is not settings:
+            _engine = (settings, Engine())
+    return _engine[1]
@@ -0,0 +1,197 @@
+'''Conditional HTTP cache'''
+import io  # Stored body as raw stream.
+import json  # Serialize stored headers.
+import logging  # Logging errors.
+import os  # Just os module?
+import sqlite3  # Cache storage.
+import threading  # Share one connection between threads.
+import time  # Last use timestamps.
+from pathlib import Path  # Create a directory if needed.
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit  # Cache key.
+
+import requests  # Requests HTTP Library.
+from requests.adapters import HTTPAdapter  # Transport adapter.
+from requests.structures import CaseInsensitiveDict  # Response headers.
+from requests.utils import get_encoding_from_headers  # Response encoding.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+logger=get_logger(__name__, "cache.log", logging.WARNING)
+
+# Stored body is decoded, these headers would describe it wrongly.
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+# Credentials are never written to cache file.
+CREDENTIAL_PARAMS = ('key', 'api_key', 'apikey', 'token', 'access_token', 'consumer_key',
+                     'consumer_secret', 'oauth_signature', 'password', 'secret')
+
+def cache_key(url):
+    '''Url without credential query parameters'''
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name.lower() not in CREDENTIAL_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+class ValidatorStore:
+    '''Last body, ETag and Last-Modified of every GET url'''
+    def __init__(self, path=None):
+        '''init ValidatorStore class'''
+        settings = get_settings()
+        self.max_entries = settings.getint('HTTP', 'max_entries', fallback=5000)
+        self.max_body = settings.getint('HTTP', 'max_body', fallback=5242880)
+        self.max_size = settings.getint('HTTP', 'max_size', fallback=104857600)
+
+        if path is None:
+            Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
+            path = os.path.join(current_dir, "cache", "http.sqlite")
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT, body BLOB, "
+                "accessed REAL)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, url):
+        '''Get (etag, last_modified, headers, body) or None'''
+        try:
+            with self.lock, self.connection:
+                row = self.connection.execute(
+                    "SELECT etag, last_modified, headers, body FROM responses WHERE url = ?",
+                    (url,)).fetchone()
+                if row is None:
+                    return None
+                self.connection.execute(
+                    "UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+            return row[0], row[1], json.loads(row[2]), row[3]
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+        return None
+
+    def set(self, url, etag, last_modified, headers, body):
+        '''Store validators and body, evict least recently used entries above limits'''
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, json.dumps(headers), body, time.time()))
+                self.connection.execute(
+                    "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses "
+                    "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+                # Running total of body sizes from most recently used
+                self.connection.execute(
+                    "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM (SELECT rowid, "
+                    "SUM(length(body)) OVER (ORDER BY accessed DESC, rowid DESC) AS total "
+                    "FROM responses) WHERE total > ?)", (self.max_size,))
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+
+    def clear(self):
+        '''Remove all entries'''
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+
+class ConditionalAdapter(HTTPAdapter):
+    '''Send If-None-Match/If-Modified-Since for known urls, serve stored body on 304'''
+    def __init__(self, store=None, **kwargs):
+        '''init ConditionalAdapter class, other options are passed to HTTPAdapter'''
+        self.store = store
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None): # pylint: disable=too-many-arguments
+        store = self.store or get_store()
+        cacheable = request.method == 'GET' and not (
+            'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers)
+        key = cache_key(request.url) if cacheable else None
+        cached = store.get(key) if cacheable else None
+
+        if cached:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                request.headers['If-None-Match'] = etag
+            if last_modified:
+                request.headers['If-Modified-Since'] = last_modified
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify,
+                                cert=cert, proxies=proxies)
+
+        if cached and response.status_code == 304:
+            response.close()
+            return self.build_cached(request, cached)
+
+        # Streamed body is read by caller in chunks, not kept in memory
+        if cacheable and not stream and response.status_code == 200:
+            self.store_response(store, response, key)
+        return response
+
+    @staticmethod
+    def store_response(store, response, key):
+        '''Keep body of response with validators under cache key'''
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+
+        # Large bodies are not read into memory
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > store.max_body:
+            return
+
+        headers = {key: value for key, value in response.headers.items()
+                   if key.lower() not in SKIPPED_HEADERS}
+        body = response.content
+        if len(body) <= store.max_body:
+            store.set(key, etag, last_modified, headers, body)
+
+    def build_cached(self, request, cached):
+        '''Response with stored body'''
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(cached[2])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = cached[3] # pylint: disable=protected-access
+        response._content_consumed = True # pylint: disable=protected-access
+        response.raw = io.BytesIO(cached[3])
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+
+_store = None
+_adapter = None
+_lock = threading.Lock()
+
+def get_store():
+    '''Get process wide validator store, rebuilt when settings are reloaded'''
+    global _store # pylint: disable=global-statement
+    settings = get_settings()
+    with _lock:
+        if _store is None or _store[0] is not settings:
+            _store = (settings, ValidatorStore())
+    return _store[1]
+
+def get_adapter():
+    '''Get process wide adapter, sessions mounting it share connections too'''
+    global _adapter # pylint: disable=global-statement
+    with _lock:
+        if _adapter is None:
+            _adapter = ConditionalAdapter(pool_connections=10, pool_maxsize=10)
+    return _adapter
+
+def mount(session, adapter=None):
+    '''Mount conditional adapter on session'''
+    adapter = adapter or get_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
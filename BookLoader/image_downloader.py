@@ -1,63 +1,121 @@
 '''download image'''
-import configparser  # Read config file.
-import glob  # Filename globing utility.
+import hashlib  # Url hash in file name.
 import logging  # Logging errors.
 import os  # Just os module?
-import shutil  # Clear directory.
+import tempfile  # Write cover atomically.
+import threading  # Safe concurrent downloads.
+import time  # Last use of cover.
 from pathlib import Path  # Create a directory if needed.
 
 import requests  # Download image.
-import requests_cache  # Cache scrapped image.
 
+from configuration import get_logger, get_settings  # Settings loaded once.
+from http_cache import mount  # Revalidate known covers.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+logger=get_logger(__name__, "image.log", logging.DEBUG)
+
+class CoverStore:
+    '''Downloaded covers kept on disk, keyed by ISBN and url'''
+    def __init__(self, folder, max_size):
+        '''init CoverStore class, max_size in bytes'''
+        self.folder = folder
+        self.max_size = max_size
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+        self.evict_lock = threading.Lock()
+        self.session = mount(requests.Session())
+        Path(self.folder).mkdir(parents=True, exist_ok=True)
+
+    def path(self, isbn, url):
+        '''Path of cover downloaded from url'''
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.folder, "%s_%s.jpg" % (isbn, url_hash))
+
+    def __lock(self, path):
+        '''Lock of single cover, same cover is downloaded once at a time'''
+        with self.locks_lock:
+            return self.locks.setdefault(path, threading.Lock())
+
+    def get(self, isbn, url):
+        '''Get path of stored cover or None'''
+        path = self.path(isbn, url)
+        try:
+            # Modification time is last use for eviction
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def fetch(self, isbn, url):
+        '''Get path of cover, download it first if not stored'''
+        path = self.path(isbn, url)
+        with self.__lock(path):
+            if self.get(isbn, url):
+                return path
 
-def get_image(image_url, isbn):
-    '''Get api request'''
-
-    current_dir = (os.path.dirname(os.path.realpath(__file__)))
-
-    Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
-    Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
-
-    logging_path = os.path.join(current_dir, "logs", "image.log")
-    cache = os.path.join(current_dir, "cache", "scraper_cache")
-
-    logging.basicConfig(filename=logging_path, level=logging.DEBUG,
-                        format='%(asctime)s %(levelname)s %(name)s %(message)s')
-    logger=logging.getLogger(__name__)
-
-    config = configparser.ConfigParser()
-    config.read(os.path.join(current_dir, 'config', 'conf.ini'))
-    image_folder = config.get("General", "image_folder")
-
-    requests_cache.install_cache(cache, backend='sqlite', expire_after=300)
-
-    try:
-        image_path = os.path.join(current_dir, image_folder)
-        image_path = Path(image_path)
-        image_files = glob.glob(os.path.join(image_path, "*"))
-        if image_path.exists() and image_path.is_dir():
-            for image in image_files:
+            request = self.session.get(url, stream=True, timeout=60)
+            if request.status_code != 200:
+                return None
+
+            # Readers see old file or whole new file, never a partial one
+            handle, temp = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    for chunk in request.iter_content(65536):
+                        file.write(chunk)
+                os.replace(temp, path)
+            except Exception:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                raise
+
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        '''Remove least recently used files while folder is above max size'''
+        with self.evict_lock:
+            files = []
+            total = 0
+            for entry in os.scandir(self.folder):
+                try:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+                except OSError:
+                    continue
+
+            for mtime, size, path in sorted(files): # pylint: disable=unused-variable
+                if total <= self.max_size:
+                    break
+                if path == keep:
+                    continue
                 try:
-                    Path(image).unlink()
+                    os.remove(path)
+                    total -= size
                 except OSError as error:
-                    print("Error: %s : %s" % (image, error.strerror))
-
-        else:
-            Path(image_path).mkdir(parents=True, exist_ok=True)
-
-    except Exception as error: # pylint: disable=broad-except
-        logger.info(error)
+                    logger.info(error)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    '''Get process wide cover store, rebuilt when settings are reloaded'''
+    global _store # pylint: disable=global-statement
+    settings = get_settings()
+    with _store_lock:
+        if _store is None or _store[0] is not settings:
+            folder = os.path.join(current_dir, settings.image_folder)
+            max_size = settings.getint('Image', 'store_size', fallback=200) * 1024 * 1024
+            _store = (settings, CoverStore(folder, max_size))
+    return _store[1]
 
+def get_image(image_url, isbn):
+    '''Get api request'''
     try:
-        path = os.path.join(image_path, str(isbn)+".jpg")
-        request = requests.get(image_url, stream=True)
-
-        if request.status_code == 200:
-            with open(path, 'wb') as file:
-                request.raw.decode_content = True
-                shutil.copyfileobj(request.raw, file)
-                # print(request.from_cache)
-                return path
+        return get_store().fetch(isbn, image_url)
 
     except Exception as error: # pylint: disable=broad-except
         logger.info(error)
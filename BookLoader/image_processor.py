@@ -0,0 +1,105 @@
+'''Cover image processing'''
+import logging  # Logging errors.
+import os  # Just os module?
+import tempfile  # Write output atomically.
+import threading  # Share pool between threads.
+from concurrent.futures import ProcessPoolExecutor  # Use all cores.
+
+from PIL import Image, ImageOps  # Image processing.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+
+logger=get_logger(__name__, "image.log", logging.WARNING)
+
+FORMATS = {
+    'jpeg'  :'.jpg',
+    'webp'  :'.webp'
+}
+
+def get_options():
+    '''Processing options from [Image] section, passed to worker processes'''
+    settings = get_settings()
+    image_format = settings.get('Image', 'format', fallback='jpeg').lower()
+    return {
+        'enabled'       :settings.getboolean('Image', 'enabled', fallback=True),
+        'max_width'     :settings.getint('Image', 'max_width', fallback=800),
+        'max_height'    :settings.getint('Image', 'max_height', fallback=1200),
+        'format'        :image_format if image_format in FORMATS else 'jpeg',
+        'quality'       :settings.getint('Image', 'quality', fallback=85)
+    }
+
+def process(path, options):
+    '''Downscale and re-encode image without metadata, returns path of new file'''
+    root = os.path.splitext(path)[0]
+    output = root + '_web' + FORMATS[options['format']]
+
+    with Image.open(path) as source:
+        # Apply EXIF rotation before metadata is dropped
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((options['max_width'], options['max_height']), Image.LANCZOS)
+
+        if options['format'] == 'jpeg' and image.mode != 'RGB':
+            # JPEG has no alpha, put transparent covers on white
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.split()[3])
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        # Pillow saves exif and icc from info, copy only pixels
+        clean = Image.new(image.mode, image.size)
+        clean.paste(image)
+
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(output) or None, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                if options['format'] == 'jpeg':
+                    clean.save(file, 'JPEG', quality=options['quality'], optimize=True,
+                               progressive=True)
+                else:
+                    clean.save(file, 'WEBP', quality=options['quality'], method=6)
+            os.replace(temp, output)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    return output
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    '''Get process wide pool of image workers'''
+    global _pool # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is None:
+            workers = get_settings().getint('Image', 'workers', fallback=0)
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    return _pool
+
+def process_many(paths):
+    '''Process images in worker processes, returns {path: processed path}, original on failure'''
+    paths = list(dict.fromkeys(path for path in paths if path))
+    options = get_options()
+    if not options['enabled'] or not paths:
+        return {path: path for path in paths}
+
+    try:
+        futures = {path: get_pool().submit(process, path, options) for path in paths}
+    except Exception as error: # pylint: disable=broad-except
+        logger.warning(error)
+        return {path: path for path in paths}
+
+    result = {}
+    for path, future in futures.items():
+        try:
+            result[path] = future.result()
+        except Exception as error: # pylint: disable=broad-except
+            logger.warning("%s: %s", path, error)
+            result[path] = path
+    return result
+
+def main(path):
+    '''Process single image'''
+    return process_many([path]).get(path, path)
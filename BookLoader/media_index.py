@@ -0,0 +1,96 @@
+'''Uploaded media index'''
+import hashlib  # Content hash.
+import logging  # Logging errors.
+import os  # Just os module?
+import sqlite3  # Index storage.
+import threading  # Share one connection between threads.
+import time  # Stored timestamps.
+from pathlib import Path  # Create a directory if needed.
+
+from configuration import get_logger  # Per module log file.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+logger=get_logger(__name__, "WP.log", logging.WARNING)
+
+# Bytes read at once while hashing.
+CHUNK_SIZE = 65536
+
+def get_hash(path):
+    '''SHA-256 of file content'''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_bytes_hash(content):
+    '''SHA-256 of downloaded content'''
+    return hashlib.sha256(content).hexdigest()
+
+class MediaIndex:
+    '''Content hash -> url of image already in WordPress media library'''
+    def __init__(self, path=None):
+        '''init MediaIndex class'''
+        if path is None:
+            Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
+            path = os.path.join(current_dir, "cache", "media.sqlite")
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                "hash TEXT PRIMARY KEY, url TEXT, media_id INTEGER, stored REAL)")
+
+    def get(self, content_hash):
+        '''Get url of uploaded image or None'''
+        entry = self.entry(content_hash)
+        return entry[0] if entry else None
+
+    def entry(self, content_hash):
+        '''Get (url, media_id) of uploaded image or None'''
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT url, media_id FROM media WHERE hash = ?", (content_hash,)).fetchone()
+            return tuple(row) if row else None
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+        return None
+
+    def set(self, content_hash, url, media_id=None):
+        '''Remember uploaded image'''
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?)",
+                    (content_hash, url, media_id, time.time()))
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+
+    def forget(self, url):
+        '''Remove image deleted from media library'''
+        try:
+            with self.lock, self.connection:
+                self.connection.execute("DELETE FROM media WHERE url = ?", (url,))
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_media_index():
+    '''Get process wide media index'''
+    global _index # pylint: disable=global-statement
+    with _index_lock:
+        if _index is None:
+            _index = MediaIndex()
+    return _index
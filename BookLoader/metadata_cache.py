@@ -0,0 +1,95 @@
+'''Persistent metadata cache'''
+import json  # Serialize cached data.
+import logging  # Logging errors.
+import os  # Just os module?
+import sqlite3  # Cache storage.
+import threading  # Share one connection between threads.
+import time  # Expiry timestamps.
+from pathlib import Path  # Create a directory if needed.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+
+current_dir = (os.path.dirname(os.path.realpath(__file__)))
+logger=get_logger(__name__, "cache.log", logging.WARNING)
+
+SOURCES = ('isbndb', 'google', 'amazon', 'goodreads')
+
+class MetadataCache:
+    '''Cache of parsed source results, keyed by ISBN and source'''
+    def __init__(self, path=None):
+        '''init MetadataCache class'''
+        settings = get_settings()
+        self.ttl = {source: settings.getint('Cache', source, fallback=604800) for source in SOURCES}
+        self.max_entries = settings.getint('Cache', 'max_entries', fallback=20000)
+
+        if path is None:
+            Path(os.path.join(current_dir, "cache")).mkdir(parents=True, exist_ok=True)
+            path = os.path.join(current_dir, "cache", "metadata.sqlite")
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "isbn TEXT, source TEXT, data TEXT, stored REAL, accessed REAL, "
+                "PRIMARY KEY (isbn, source))")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed)")
+
+    def get(self, isbn, source):
+        '''Get cached data or None if missing or expired'''
+        now = time.time()
+        try:
+            with self.lock, self.connection:
+                row = self.connection.execute(
+                    "SELECT data, stored FROM metadata WHERE isbn = ? AND source = ?",
+                    (str(isbn), source)).fetchone()
+                if row is None:
+                    return None
+
+                if now - row[1] > self.ttl.get(source, 0):
+                    self.connection.execute(
+                        "DELETE FROM metadata WHERE isbn = ? AND source = ?", (str(isbn), source))
+                    return None
+
+                self.connection.execute(
+                    "UPDATE metadata SET accessed = ? WHERE isbn = ? AND source = ?",
+                    (now, str(isbn), source))
+            return json.loads(row[0])
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+        return None
+
+    def set(self, isbn, source, data):
+        '''Store data and evict least recently used entries above limit'''
+        now = time.time()
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                    (str(isbn), source, json.dumps(data), now, now))
+                self.connection.execute(
+                    "DELETE FROM metadata WHERE rowid IN (SELECT rowid FROM metadata "
+                    "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+
+    def clear(self):
+        '''Remove all entries'''
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM metadata")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    '''Get process wide cache, rebuilt when settings are reloaded'''
+    global _cache # pylint: disable=global-statement
+    settings = get_settings()
+    with _cache_lock:
+        if _cache is None or _cache[0] is not settings:
+            _cache = (settings, MetadataCache())
+    return _cache[1]
@@ -1,10 +1,23 @@
 '''amazon'''
 import re
-from threading import Thread
-import requests
-from bs4 import BeautifulSoup
+import threading
+from configuration import get_settings
+from private import page_parser, transport
+from private.scheduler import get_scheduler
 import time
 
+# ISBN-13 value of detail bullets, found in raw page without parsing
+ISBN_13 = re.compile(rb'ISBN-13[^<]{0,40}</span>\s*<span[^>]*>\s*([0-9][0-9-]{12,16})')
+
+# Parts of pages scrapped below, Soup is built only from them
+SEARCH = page_parser.selector("//div[contains(@class, 's-main-slot')]")
+PRODUCT = page_parser.selector(
+    "//*[@id='detailBullets_feature_div' or @id='productTitle' or @id='imgBlkFront'"
+    " or @id='bookDescription_feature_div']",
+    "//span[contains(@class, 'notFaded')]",
+    "//a[contains(@class, 'authorNameLink')]",
+    "//ul[contains(@class, 'zg_hrsr')]")
+
 
 class AmazonScrapper:
     ''' Improved amazon scrapper'''
@@ -22,21 +35,20 @@ class AmazonScrapper:
         self.url_list = []
         self.amazon_dict = {}
         self.time_start = time.time()
+        # Pages are parsed one at a time, nothing is added after enough matches
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        # First-match mode stops after enough matching pages, 0 scraps all pages
+        self.enough = get_settings().getint("Scraper", "amazon_matches", fallback=1)
+        self.found = 0
         self.get_url_list()
         self.unpack_url_list()
 
     def get_url_list(self):
-        ''' Find urls in threads '''
+        ''' Find urls on both domains '''
 
         try:
-            co_uk_thread = Thread(target=self.get_co_uk_list)
-            co_uk_thread.start()
-
-            com_thread = Thread(target=self.get_com_list)
-            com_thread.start()
-
-            co_uk_thread.join()
-            com_thread.join()
+            get_scheduler().map(lambda search: search(), [self.get_co_uk_list, self.get_com_list])
         except Exception as error:
             print(error)
             pass
@@ -50,10 +62,8 @@ class AmazonScrapper:
         }
         try:
             url = 'https://www.amazon.co.uk/s?k={}&ref=nb_sb_noss'.format(self.item)
-            requests_session = requests.Session()
-            requests_session.headers = headers
-            page = requests_session.get(url, headers=headers)
-            soup = BeautifulSoup(page.content, 'lxml',from_encoding=page.encoding)
+            page = transport.get(url, headers=headers)
+            soup = page_parser.parse(page, SEARCH)
             span_list = soup.find("div",attrs={"class": "s-main-slot s-result-list s-search-results sg-row"})
             span_list = span_list.findAll("div",attrs={"class": "a-section a-spacing-medium"})
 
@@ -77,10 +87,8 @@ class AmazonScrapper:
         }
         try:
             url = 'https://www.amazon.com/s?k={}&ref=nb_sb_noss'.format(self.item)
-            requests_session = requests.Session()
-            requests_session.headers = headers
-            page = requests_session.get(url, headers=headers)
-            soup = BeautifulSoup(page.content, 'lxml',from_encoding=page.encoding)
+            page = transport.get(url, headers=headers)
+            soup = page_parser.parse(page, SEARCH)
             span_list = soup.find("div",attrs={"class": "s-main-slot s-result-list s-search-results sg-row"})
             span_list = span_list.findAll("div",attrs={"class": "a-section a-spacing-medium"})
 
@@ -102,9 +110,29 @@ class AmazonScrapper:
         "User-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.128 Safari/537.36 Edg/89.0.774.77",
         "action": "sign-in"
         }
-        requests_session = requests.Session()
-        page = requests_session.get(amazon_url, headers=headers)
-        soup = BeautifulSoup(page.content, 'lxml', from_encoding=page.encoding)
+        if self.cancelled.is_set():
+            return None
+        page = transport.get(amazon_url, headers=headers)
+
+        # Other book, skip parsing
+        isbn = ISBN_13.search(page.content)
+        if isbn and isbn.group(1).replace(b'-', b'').decode() != self.item:
+            return None
+
+        with self.lock:
+            if self.cancelled.is_set():
+                return None
+            found = self.parse_product(page)
+            # Next page may take the lock before scheduler sees this result
+            if found and self.enough:
+                self.found += 1
+                if self.found >= self.enough:
+                    self.cancelled.set()
+            return found
+
+    def parse_product(self, page):
+        ''' Scrap parsed page, true if page is the book '''
+        soup = page_parser.parse(page, PRODUCT)
 
         # Book details
         try:
@@ -243,16 +271,14 @@ class AmazonScrapper:
         except Exception: # pylint: disable=broad-except
             binding = None
 
+        return True
+
     def unpack_url_list(self):
-        ''' Thread for url list '''
-        thread_list = []
-        for url in self.url_list:
-            worker = Thread(target=self.get_product,args=(url,))
-            thread_list.append(worker)
-        for thread in thread_list:
-            thread.start()
-        for thread in thread_list:
-            thread.join()
+        ''' Scrap product pages on shared scheduler '''
+        get_scheduler().first(self.get_product, self.url_list, self.enough, self.cancelled)
+        # Wait for page being parsed right now
+        with self.lock:
+            pass
 
 
     def get_dictionary(self):
@@ -1,6 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
-import lxml
+from private import page_parser, transport
+
+# Parts of book page scrapped below, Soup is built only from them
+BOOK = page_parser.selector(
+    "//*[@id='bookTitle' or @id='coverImage' or @id='description' or @id='details']",
+    "//span[@itemprop='name' or @itemprop='bookFormat']",
+    "//a[contains(@class, 'bookPageGenreLink')]")
 
 
 def goodread_search(item):
@@ -26,8 +30,8 @@ def goodread_search(item):
         "User-agent": "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/49.0.2623.110 Safari/537.36",
         "action": "sign-in"
         }
-        page = requests.get(goodread_url, headers=headers)
-        soup = BeautifulSoup(page.content, 'lxml', from_encoding=page.encoding)
+        page = transport.get(goodread_url, headers=headers)
+        soup = page_parser.parse(page, BOOK)
         return soup
         
     # Find Title
@@ -0,0 +1,41 @@
+''' Scoped page parsing '''
+import logging
+
+from bs4 import BeautifulSoup
+from lxml import etree
+import lxml.html
+
+from configuration import get_logger
+
+logger = get_logger(__name__, "scraper.log", logging.WARNING)
+
+
+def selector(*expressions):
+    ''' Precompiled XPath of page parts scrapper reads, superset of its find calls is enough '''
+    return etree.XPath(' | '.join(expressions))
+
+
+def parse(page, scope=None):
+    ''' Parse page to Soup
+
+    With scope the page is read by lxml only, Soup is built just from selected
+    elements in document order, so find calls give the same results as on whole page.
+    Whole page is parsed when scope is None or lxml fails.
+    '''
+    if scope is not None:
+        try:
+            parser = lxml.html.HTMLParser(encoding=page.encoding)
+            root = lxml.html.document_fromstring(page.content, parser=parser)
+            kept = set()
+            parts = []
+            for element in scope(root):
+                # Descendant of kept element is already in its markup
+                if any(ancestor in kept for ancestor in element.iterancestors()):
+                    continue
+                kept.add(element)
+                parts.append(lxml.html.tostring(element, encoding='unicode', with_tail=False))
+            return BeautifulSoup(''.join(parts), 'lxml')
+        except Exception as error: # pylint: disable=broad-except
+            logger.warning(error)
+
+    return BeautifulSoup(page.content, 'lxml', from_encoding=page.encoding)
@@ -0,0 +1,101 @@
+''' Scrape scheduler '''
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from configuration import get_logger, get_settings
+
+logger = get_logger(__name__, "scraper.log", logging.WARNING)
+
+
+class RateLimiter:
+    ''' Spread requests to one domain at least 1/rate seconds apart '''
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_start = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        ''' Block until request can start '''
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Scheduler:
+    ''' Shared executor, global request cap and per-domain rate limits of all scrapers '''
+    def __init__(self):
+        settings = get_settings()
+        self.workers = settings.getint("Scraper", "workers", fallback=8)
+        self.rate = settings.getfloat("Scraper", "rate", fallback=2)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape")
+        self.slots = threading.BoundedSemaphore(self.workers)
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, domain):
+        ''' Get rate limiter of domain '''
+        with self.lock:
+            if domain not in self.limiters:
+                self.limiters[domain] = RateLimiter(self.rate)
+        return self.limiters[domain]
+
+    @contextmanager
+    def slot(self, domain):
+        ''' Hold one of global request slots, started no sooner than domain rate allows '''
+        # Wait for domain turn first, sleeping request must not hold shared slot
+        self.limiter(domain).wait()
+        with self.slots:
+            yield
+
+    def map(self, function, items):
+        ''' Run function for every item on shared executor, results in order of items, None on error '''
+        futures = [self.executor.submit(function, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as error: # pylint: disable=broad-except
+                logger.warning(error)
+                results.append(None)
+        return results
+
+    def first(self, function, items, enough, cancelled):
+        ''' Run function for items until enough of them returned true, then cancel the rest
+
+        Waiting items are cancelled, running ones should check cancelled event. Returns number of true results.
+        '''
+        futures = [self.executor.submit(function, item) for item in items]
+        found = 0
+        try:
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        found += 1
+                except Exception as error: # pylint: disable=broad-except
+                    logger.warning(error)
+                if enough and found >= enough:
+                    break
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+        return found
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    ''' Get process wide scheduler, rebuilt when settings are reloaded '''
+    global _scheduler # pylint: disable=global-statement
+    settings = get_settings()
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler[0] is not settings:
+            _scheduler = (settings, Scheduler())
+    return _scheduler[1]
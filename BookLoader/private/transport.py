@@ -0,0 +1,67 @@
+''' Scrapers HTTP transport '''
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from configuration import get_settings
+from http_cache import ConditionalAdapter
+from private.scheduler import get_scheduler
+
+
+class Transport:
+    ''' Long-lived keep-alive session per scrapped domain '''
+    def __init__(self):
+        settings = get_settings()
+        self.pool_size = settings.getint("Scraper", "pool_size", fallback=4)
+        self.timeout = (settings.getfloat("Scraper", "connect_timeout", fallback=5),
+                        settings.getfloat("Scraper", "read_timeout", fallback=20))
+        self.retries = settings.getint("Scraper", "retries", fallback=2)
+        # Replay server of recorded pages, e.g. http://127.0.0.1:8765, see benchmark/replay.py
+        self.replay = settings.get("Scraper", "replay", fallback="").rstrip("/")
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session(self, domain):
+        ''' Get session of domain, e.g. www.amazon.com '''
+        with self.lock:
+            if domain not in self.sessions:
+                retry = Retry(total=self.retries, backoff_factor=0.5,
+                              status_forcelist=(500, 502, 503, 504), raise_on_status=False)
+                adapter = ConditionalAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                             max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # gzip, deflate and br when brotli package is installed
+                session.headers.update(make_headers(accept_encoding=True))
+                self.sessions[domain] = session
+        return self.sessions[domain]
+
+    def get(self, url, headers=None, **kwargs):
+        ''' GET url on session of its domain, within scheduler limits '''
+        kwargs.setdefault("timeout", self.timeout)
+        domain = urlsplit(url).netloc
+        if self.replay:
+            url = "%s/%s" % (self.replay, url.split("://", 1)[1])
+        with get_scheduler().slot(domain):
+            return self.session(domain).get(url, headers=headers, **kwargs)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    ''' Get process wide transport, rebuilt when settings are reloaded '''
+    global _transport # pylint: disable=global-statement
+    settings = get_settings()
+    with _transport_lock:
+        if _transport is None or _transport[0] is not settings:
+            _transport = (settings, Transport())
+    return _transport[1]
+
+def get(url, headers=None, **kwargs):
+    ''' GET url with shared transport '''
+    return get_transport().get(url, headers=headers, **kwargs)
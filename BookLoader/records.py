@@ -0,0 +1,108 @@
+'''Source records'''
+import logging  # Logging errors.
+
+from configuration import get_logger  # Per module log file.
+
+logger=get_logger(__name__, "book.log", logging.WARNING)
+
+class Missing: # pylint: disable=too-few-public-methods
+    '''Marker of field not returned by source'''
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+MISSING = Missing()
+
+def list_expander(expander_list):
+    '''Expand list elements to string'''
+    try:
+        if len(expander_list) > 1:
+            return ', '.join(expander_list)
+        if len(expander_list) == 1:
+            return expander_list[0]
+        return None
+
+    except Exception as error: # pylint: disable=broad-except
+        logger.info(error)
+
+def year(value):
+    '''First four characters of date'''
+    try:
+        return value[:4]
+    except Exception: # pylint: disable=broad-except
+        return MISSING
+
+class BookRecord: # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    '''Book fields read once from source response'''
+    __slots__ = ('title', 'authors', 'description', 'binding', 'publisher',
+                 'publish_date', 'categories', 'image')
+
+    def __init__(self, **fields):
+        '''init BookRecord class'''
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field, MISSING))
+
+    def __repr__(self):
+        return 'BookRecord(%s)' % ', '.join('%s=%r' % (field, getattr(self, field))
+                                            for field in self.__slots__)
+
+    def fields(self):
+        '''Yield (field, value) for fields returned by source'''
+        for field in self.__slots__:
+            value = getattr(self, field)
+            if value is not MISSING:
+                yield field, value
+
+    @classmethod
+    def from_isbndb(cls, data):
+        '''Record from decoded ISBNdb response'''
+        try:
+            book = data["book"]
+        except Exception: # pylint: disable=broad-except
+            return cls()
+
+        authors = book.get("authors", MISSING)
+        return cls(
+            title=book.get("title", MISSING),
+            authors=MISSING if authors is MISSING else list_expander(authors),
+            binding=book.get("binding", MISSING),
+            publisher=book.get("publisher", MISSING),
+            publish_date=year(book.get("date_published", MISSING)),
+            categories=book.get("subjects", MISSING)
+        )
+
+    @classmethod
+    def from_google(cls, data):
+        '''Record from decoded Google Books response'''
+        try:
+            volume = data["items"][0]["volumeInfo"]
+        except Exception: # pylint: disable=broad-except
+            return cls()
+
+        authors = volume.get("authors", MISSING)
+        return cls(
+            title=volume.get("title", MISSING),
+            authors=MISSING if authors is MISSING else list_expander(authors),
+            description=volume.get("description", MISSING),
+            publisher=volume.get("publisher", MISSING),
+            publish_date=year(volume.get("publishedDate", MISSING)),
+            categories=volume.get("categories", MISSING)
+        )
+
+    @classmethod
+    def from_scrapper(cls, data):
+        '''Record from Amazon or Goodreads scrapper dictionary'''
+        if not isinstance(data, dict):
+            return cls()
+
+        return cls(
+            title=data.get("title", MISSING),
+            authors=data.get("author", MISSING),
+            description=data.get("description", MISSING),
+            binding=data.get("binding", MISSING),
+            publisher=data.get("publisher", MISSING),
+            publish_date=year(data.get("year", MISSING)),
+            categories=data.get("categories", MISSING),
+            image=data.get("image", MISSING)
+        )
@@ -13,6 +13,8 @@ import configparser
 import os
 import ast
 
+from configuration import reload_settings
+
 class Ui_Settings(object):
 
     def save_category_synonims(self):
@@ -135,6 +137,7 @@ class Ui_Settings(object):
                 config.write(configfile)
             with open(os.path.join(os.path.dirname(__file__), 'config', 'category.ini'), 'w') as configfile: # Save category.ini
                 self.category_config.write(configfile)
+            reload_settings() # Read saved files again
             self.msg.setIcon(QtWidgets.QMessageBox.Information)
             self.msg.setText("Ustawienia zostły zaktualizowane")
             self.change = False
@@ -0,0 +1,109 @@
+'''SKU index'''
+import logging  # Logging errors.
+import threading  # Share index between threads.
+import time  # Refresh interval.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+from database import MySQL  # MySQL Query.
+
+logger=get_logger(__name__, "Woo.log", logging.WARNING)
+
+class SkuIndex:
+    '''In memory SKU -> product id index of whole shop'''
+    def __init__(self, rest_sweep=None):
+        '''init SkuIndex class
+
+        rest_sweep(modified) yields (sku, id, status, modified) and is used when MySQL is not available.
+        '''
+        settings = get_settings()
+        self.refresh_interval = settings.getint("Index", "refresh", fallback=300)
+        self.miss_interval = settings.getint("Index", "miss_refresh", fallback=10)
+        self.rebuild_interval = settings.getint("Index", "rebuild", fallback=3600)
+        self.rest_sweep = rest_sweep
+        self.index = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.source = None
+        self.modified = None
+        self.refreshed = 0
+        self.rebuilt = 0
+
+    def __rows(self, modified):
+        '''Get rows changed since modified, all rows if None, first load decides source'''
+        if self.source in (None, "mysql"):
+            try:
+                rows = MySQL().db_mysql_skus(modified)
+                self.source = "mysql"
+                return rows
+
+            except Exception as error: # pylint: disable=broad-except
+                logger.info(error)
+                if self.source == "mysql" or self.rest_sweep is None:
+                    raise
+
+        rows = list(self.rest_sweep(modified))
+        self.source = "rest"
+        return rows
+
+    def refresh(self, force=False):
+        '''Load whole index first time and every rebuild interval, otherwise only products
+        modified since last refresh. Rebuild drops products deleted from shop.'''
+        with self.lock:
+            if not force and time.time() - self.refreshed < self.miss_interval:
+                return
+
+            full = not self.loaded or time.time() - self.rebuilt > self.rebuild_interval
+            try:
+                rows = self.__rows(None if full else self.modified)
+            except Exception as error: # pylint: disable=broad-except
+                logger.info(error)
+                self.refreshed = time.time()
+                return
+
+            index = {} if full else self.index
+            modified = None if full else self.modified
+            for sku, product_id, status, changed in rows:
+                if status == "trash":
+                    if index.get(sku) == product_id:
+                        del index[sku]
+                elif sku:
+                    index[sku] = product_id
+                if changed and (modified is None or changed > modified):
+                    modified = changed
+
+            self.index = index
+            self.modified = modified
+            self.loaded = True
+            self.refreshed = time.time()
+            if full:
+                self.rebuilt = self.refreshed
+
+    def get(self, sku):
+        '''Get product id of SKU or None, index is refreshed when stale or on miss'''
+        sku = str(sku)
+        if not self.loaded:
+            self.refresh()
+        elif time.time() - self.refreshed > self.refresh_interval:
+            self.refresh(force=True)
+
+        product_id = self.index.get(sku)
+        if product_id is None and self.loaded:
+            self.refresh()
+            product_id = self.index.get(sku)
+
+        return product_id
+
+    def lookup(self, sku):
+        '''Get product id of SKU from memory only'''
+        return self.index.get(str(sku))
+
+    def add(self, sku, product_id):
+        '''Add product created by us'''
+        if sku and product_id:
+            self.index[str(sku)] = product_id
+
+    def remove(self, sku, product_id=None):
+        '''Drop SKU found to point to deleted product, only if it still points to product_id'''
+        sku = str(sku)
+        if product_id is None or self.index.get(sku) == product_id:
+            self.index.pop(sku, None)
@@ -0,0 +1,56 @@
+'''WooCommerce taxonomy cache'''
+import html  # Unescape term names.
+import threading  # Share cache between threads.
+import time  # Expiry timestamps.
+
+from configuration import get_settings  # Settings loaded once.
+
+class TaxonomyCache:
+    '''Name -> ids map of all terms of one taxonomy (categories or tags)'''
+    def __init__(self, endpoint):
+        '''init TaxonomyCache class'''
+        settings = get_settings()
+        self.endpoint = endpoint
+        self.ttl = settings.getint("WooCommerce", "taxonomy_ttl", fallback=600)
+        self.lock = threading.Lock()
+        self.terms = None
+        self.names = {}
+        self.loaded = 0
+
+    def __load(self, fetch):
+        '''Fetch all pages of taxonomy, keep old terms if shop is not available'''
+        response = fetch(self.endpoint)
+        if response is None:
+            return
+
+        terms = {}
+        names = {}
+        for term in response:
+            # Names come html escaped, GUI shows them unescaped
+            name = html.unescape(term["name"])
+            terms[term["id"]] = name
+            names.setdefault(name, []).append(term["id"])
+
+        self.terms = terms
+        self.names = names
+        self.loaded = time.time()
+
+    def get(self, fetch):
+        '''Get {id: name} of all terms or None, fetch(endpoint) is called when expired'''
+        with self.lock:
+            if self.terms is None or time.time() - self.loaded > self.ttl:
+                self.__load(fetch)
+            if self.terms is None:
+                return None
+            return dict(self.terms)
+
+    def ids(self, names, fetch):
+        '''Get ids of terms with given names'''
+        if self.get(fetch) is None:
+            return set()
+        return {term_id for name in names for term_id in self.names.get(name, [])}
+
+    def invalidate(self):
+        '''Reload terms on next use'''
+        with self.lock:
+            self.loaded = 0
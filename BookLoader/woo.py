@@ -1,58 +1,53 @@
 '''WooCommerce API integrator'''
-import configparser  # Read config file.
+import html  # Unescape term names.
 import inspect  # Get function name.
 import logging  # Logging errors.
-import os  # Just os module?
-from pathlib import Path  # Create a directory if needed.
-
-from woocommerce import API as woo  # woocommerce API
-
-from database import MySQL # MySQL Query.
+import threading  # Share index between threads.
+from concurrent.futures import ThreadPoolExecutor  # Fetch pages concurrently.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+from database import MySQL, get_post_ids # MySQL Query.
+from media_index import get_media_index  # Forget images Woo can not fetch.
+from sku_index import SkuIndex  # SKU -> product id.
+from taxonomy import TaxonomyCache  # Category and tag names -> ids.
+from woo_client import get_client  # Shared WooCommerce API client.
 from wp import main as wp  # WordPress API
+from wp import upload_many  # Parallel WordPress uploads.
 
-current_dir = (os.path.dirname(os.path.realpath(__file__)))
-Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
-logging_path = os.path.join(current_dir, "logs", "Woo.log")
-logging.basicConfig(filename=logging_path, level=logging.WARNING,
-                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
-logger=logging.getLogger(__name__)
+# Maximum number of creates and updates accepted by products/batch.
+BATCH_SIZE = 100
+
+logger=get_logger(__name__, "Woo.log", logging.WARNING)
 
 class WooCommerce: # pylint: disable=too-few-public-methods
     '''Woo class'''
     def __init__(self, book):
         '''init Woo class'''
-        config = configparser.ConfigParser()
-        config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-        self.woo_url = config.get("WooCommerce", "url")
-        self.woo_key = config.get("WooCommerce", "key")
-        self.woo_secret = config.get("WooCommerce", "secret")
+        settings = get_settings()
+        self.woo_url = settings.get("WooCommerce", "url")
+        self.woo_key = settings.get("WooCommerce", "key")
+        self.woo_secret = settings.get("WooCommerce", "secret")
         self.book = book
+        self.workers = settings.getint("WooCommerce", "workers", fallback=8)
+        self.batch_timeout = settings.getfloat("WooCommerce", "batch_timeout", fallback=120)
         self.error_codes = [401, 404, 500]
         self.error_catch = []
 
     def get_woo_request(self):
-        '''Get WooCommerce api request'''
+        '''Get shared WooCommerce api client'''
         try:
-            response = woo(
-                url=self.woo_url,
-                consumer_key=self.woo_key,
-                consumer_secret=self.woo_secret,
-                wp_api=True,
-                version="wc/v2",
-                query_string_auth=True,
-                verify_ssl = True,
-                timeout=10
-            )
+            response = get_client()
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
         return response
 
     def get_woo_product(self, post_id):
-        '''Get WooCommerce product'''
+        '''Get WooCommerce product, raw fields as edited and compared on update'''
         try:
             auth = self.get_woo_request()
             # response = auth.get("products").json()
-            response = auth.get("products/" + str(post_id)).json()
+            # View context wraps description in html
+            response = auth.get("products/" + str(post_id), params={"context": "edit"}).json()
 
             # Send none if status code found in error codes
             if "data" in response:
@@ -65,11 +60,11 @@ class WooCommerce: # pylint: disable=too-few-public-methods
 
         return response
 
-    def get_woo_products(self, page):
+    def get_woo_products(self, page, params=None):
         '''Get WooCommerce products'''
         try:
             auth = self.get_woo_request()
-            response = auth.get("products", params={"per_page":100, "page":page}).json()
+            response = auth.get("products", params={"per_page":100, "page":page, **(params or {})}).json() # pylint: disable=line-too-long
 
             # Send none if status code found in error codes
             if "data" in response:
@@ -84,165 +79,30 @@ class WooCommerce: # pylint: disable=too-few-public-methods
 
     def get_woo_categories(self):
         '''Get WooCommerce category'''
-        dictionary = {}
-        try:
-            auth = self.get_woo_request()
-            response = auth.get("products/categories", params={"per_page":100}).json()
-
-            # Send none if status code found in error codes
-            if "data" in response:
-                if response.get("data", {}).get("status") in self.error_codes:
-                    self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
-                    return None
-
-            for category in response:
-                if "amp;" in category["name"]:
-                    category["name"] = category["name"].replace("amp;","")
-                dictionary[category["id"]] = category["name"]
-
-        except Exception as error: # pylint: disable=broad-except
-            logger.info(error)
-
-        return dictionary
+        return get_taxonomy("products/categories").get(self.get_woo_pages)
 
     def get_woo_tags(self):
         '''Get WooCommerce tags'''
-        dictionary = {}
-        try:
-            auth = self.get_woo_request()
-            response = auth.get("products/tags", params={"per_page":100}).json()
-
-            # Send none if status code found in error codes
-            if "data" in response:
-                if response.get("data", {}).get("status") in self.error_codes:
-                    self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
-                    return None
-
-            for tag in response:
-                if "amp;" in tag["name"]:
-                    tag["name"] = tag["name"].replace("amp;","")
-                dictionary[tag["id"]] = tag["name"]
-
-        except Exception as error: # pylint: disable=broad-except
-            logger.info(error)
-
-        return dictionary
+        return get_taxonomy("products/tags").get(self.get_woo_pages)
 
     def prepare_update_woo_products(self):
         '''Prepare WooCommerce product update'''
         try:
             # Auth
             auth = self.get_woo_request()
-            response = auth.get("products/" + str(self.book["id"])).json()
-            if response:
-                # Upload image
-                image = wp(self.book["image"])
-                data = {
-                    "name": self.book["name"],
-                    "description": self.book["description"],
-                    "sku": self.book["isbn"],
-                    "categories": [],
-                    "tags": [],
-                    "attributes": [
-                        {
-                        "id": 1,
-                        "name": "Tytuł",  # cspell: disable-line
-                        "position": 1,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["title"]]
-                        },
-                        {
-                        "id": 2,
-                        "name": "Autor",  # cspell: disable-line
-                        "position": 2,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["authors"]]
-                        },
-                        {
-                        "id": 3,
-                        "name": "Wydawnictwo",  # cspell: disable-line
-                        "position": 3,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["publisher"]]
-                        },
-                        {
-                        "id": 4,
-                        "name": "Rok wydania",  # cspell: disable-line
-                        "position": 4,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["publish_date"]]
-                        },
-                        {
-                        "id": 5,
-                        "name": "Okładka",  # cspell: disable-line
-                        "position": 5,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["binding"]]
-                        },
-                        {
-                        "id": 6,
-                        "name": "ISBN",
-                        "position": 6,
-                        "visible": True,
-                        "variation": True,
-                        "options": [self.book["isbn"]]
-                        }
-                    ]
-                }
-
-                # Tags
-                try:
-                    if self.book["tags"]:
-                        tags = self.validate_tags()
-                        for tag in tags:
-                            data["tags"].append({'id':tag})
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Image
-                try:
-                    if image:
-                        data["images"] = [{"src": image}]
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Price
-                try:
-                    if self.book["price"]:
-                        data["regular_price"] = self.book["price"]
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Sale Price
-                try:
-                    if self.book["sale_price"]:
-                        data["sale_price"] = self.book["sale_price"]
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Amount
-                try:
-                    if self.book["amount"]:
-                        data["manage_stock"] = True
-                        data["stock_quantity"] = self.book["amount"]
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Get category ID
-                try:
-                    categories = self.validate_category()
-                    for category in categories:
-                        data["categories"].append({'id':category})
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                # Send request
-                response = self.update_woo_products(self.book["id"], data)
+            # Raw fields, view context wraps description in html
+            response = auth.get("products/" + str(self.book["id"]), params={"context": "edit"}).json() # pylint: disable=line-too-long
+            if response and "id" in response:
+                # Upload image only if cover was changed
+                image = None
+                if not self.is_same_image(response):
+                    image = wp(self.book["image"])
+                data = self.get_product_data(image)
+
+                # Send request with changed fields only
+                changes = get_product_diff(data, response)
+                if changes:
+                    response = self.update_woo_products(self.book["id"], changes)
 
                 # Send none if status code found in error codes
                 if "data" in response:
@@ -273,12 +133,131 @@ class WooCommerce: # pylint: disable=too-few-public-methods
 
         return output
 
+    def get_product_data(self, image):
+        '''Build product payload of book, image is url of uploaded cover'''
+        data = {
+            "name": self.book["name"],
+            "description": self.book["description"],
+            "sku": self.book["isbn"],
+            "categories": [],
+            "tags": [],
+            "attributes": [
+                {
+                "id": 1,
+                "name": "Tytuł",  # cspell: disable-line
+                "position": 1,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["title"]]
+                },
+                {
+                "id": 2,
+                "name": "Autor",  # cspell: disable-line
+                "position": 2,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["authors"]]
+                },
+                {
+                "id": 3,
+                "name": "Wydawnictwo",  # cspell: disable-line
+                "position": 3,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["publisher"]]
+                },
+                {
+                "id": 4,
+                "name": "Rok wydania",  # cspell: disable-line
+                "position": 4,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["publish_date"]]
+                },
+                {
+                "id": 5,
+                "name": "Okładka",  # cspell: disable-line
+                "position": 5,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["binding"]]
+                },
+                {
+                "id": 6,
+                "name": "ISBN",
+                "position": 6,
+                "visible": True,
+                "variation": True,
+                "options": [self.book["isbn"]]
+                }
+            ]
+        }
+
+        # Tags
+        try:
+            if self.book["tags"]:
+                tags = self.validate_tags()
+                for tag in tags:
+                    data["tags"].append({'id':tag})
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        # Image
+        try:
+            if image:
+                data["images"] = [{"src": image}]
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        # Price
+        try:
+            if self.book["price"]:
+                data["regular_price"] = self.book["price"]
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        # Sale Price
+        try:
+            if self.book["sale_price"]:
+                data["sale_price"] = self.book["sale_price"]
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        # Amount
+        try:
+            if self.book["amount"]:
+                data["manage_stock"] = True
+                data["stock_quantity"] = self.book["amount"]
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        # Get category ID
+        try:
+            categories = self.validate_category()
+            for category in categories:
+                data["categories"].append({'id':category})
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+        return data
+
+    def is_same_image(self, product):
+        '''Check if cover of book was downloaded from product image'''
+        try:
+            image_src = self.book.get("image_src")
+            return bool(image_src) and any(image["src"] == image_src for image in product.get("images", [])) # pylint: disable=line-too-long
+
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+        return False
+
     def update_woo_products(self, product_id, data):
         '''Post WooCommerce product'''
         try:
             # Auth
             auth = self.get_woo_request()
             response = auth.put("products/" + str(product_id), data).json()
+            forget_failed_image(response, data)
 
             # Send none if status code found in error codes
             if "data" in response:
@@ -307,132 +286,89 @@ class WooCommerce: # pylint: disable=too-few-public-methods
                     self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
                     return None
 
+            # New term, next validation has to see it
+            get_taxonomy("products/categories").invalidate()
+
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
 
         return response
 
-    def post_woo_products(self):
-        '''Post WooCommerce product'''
+    def post_woo_batch(self, create=None, update=None):
+        '''Create and update up to BATCH_SIZE products in one request'''
         try:
-            # Auth
             auth = self.get_woo_request()
-            # Upload image to media
-            image = wp(self.book["image"])
-
             data = {
-                "name": self.book["name"],
-                "description": self.book["description"],
-                "sku": self.book["isbn"],
-                "categories": [],
-                "tags": [],
-                "attributes": [
-                    {
-                    "id": 1,
-                    "name": "Tytuł",  # cspell: disable-line
-                    "position": 1,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["title"]]
-                    },
-                    {
-                    "id": 2,
-                    "name": "Autor",  # cspell: disable-line
-                    "position": 2,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["authors"]]
-                    },
-                    {
-                    "id": 3,
-                    "name": "Wydawnictwo",  # cspell: disable-line
-                    "position": 3,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["publisher"]]
-                    },
-                    {
-                    "id": 4,
-                    "name": "Rok wydania",  # cspell: disable-line
-                    "position": 4,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["publish_date"]]
-                    },
-                    {
-                    "id": 5,
-                    "name": "Okładka",  # cspell: disable-line
-                    "position": 5,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["binding"]]
-                    },
-                    {
-                    "id": 6,
-                    "name": "ISBN",
-                    "position": 6,
-                    "visible": True,
-                    "variation": True,
-                    "options": [self.book["isbn"]]
-                    }
-                ]
+                "create": create or [],
+                "update": update or []
             }
 
-            # Tags
-            try:
-                if self.book["tags"]:
-                    tags = self.validate_tags()
-                    for tag in tags:
-                        data["tags"].append({'id':tag})
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+            response = auth.post("products/batch", data, timeout=self.batch_timeout).json()
 
-            # Image
-            try:
-                if image:
-                    data["images"] = [{"src": image}]
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+            # Send none if status code found in error codes
+            if "data" in response:
+                if response.get("data", {}).get("status") in self.error_codes:
+                    self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
+                    return None
 
-            # Price
-            try:
-                if self.book["price"]:
-                    data["regular_price"] = self.book["price"]
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+            return None
 
-            # Sale Price
-            try:
-                if self.book["sale_price"]:
-                    data["sale_price"] = self.book["sale_price"]
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+        return response
 
-            # Amount
-            try:
-                if self.book["amount"]:
-                    data["manage_stock"] = True
-                    data["stock_quantity"] = self.book["amount"]
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+    def post_woo_products(self):
+        '''Post WooCommerce product'''
+        output = None
+        try:
+            # Look up SKU in memory first
+            existing = get_sku_index().get(self.book["isbn"])
 
-            # Get category ID
-            try:
-                categories = self.validate_category()
-                for category in categories:
-                    data["categories"].append({'id':category})
-            except Exception as error:  # pylint: disable=broad-except
-                logger.info(error)
+            # Auth
+            auth = self.get_woo_request()
+            # Upload image to media
+            image = wp(self.book["image"])
+
+            data = self.get_product_data(image)
+
+            # Product already in shop, add stock instead of creating duplicate
+            if existing:
+                product = self.get_existing(existing)
+                if product is None:
+                    return None
+                if product:
+                    return self.add_to_existing(product, data)
+                # Index pointed to deleted product, create it again
 
             # Send request
             response = auth.post("products", data).json()
 
+            # Indexed image was deleted from media library, upload it again once
+            if forget_failed_image(response, data):
+                data = self.get_product_data(wp(self.book["image"]))
+                response = auth.post("products", data).json()
+
             # Send none if status code found in error codes
             if "data" in response:
                 if response.get("data", {}).get("status") in self.error_codes:
                     self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
                     return None
 
+            # SKU exists, but index did not know it yet
+            if response.get("data", {}).get("status") == 400:
+                try:
+                    mysql_request = MySQL(isbn=self.book["isbn"])
+                    request = mysql_request.db_mysql()
+
+                except Exception as error:  # pylint: disable=broad-except
+                    logger.info(error)
+                    request = None
+
+                product = self.get_existing(request) if request else None
+                if product:
+                    return self.add_to_existing(product, data)
+                return None
+
             # Format output
             try:
                 output = {
@@ -441,50 +377,62 @@ class WooCommerce: # pylint: disable=too-few-public-methods
                     'link'          :response["permalink"],
                     'source'        :False
                 }
+                get_sku_index().add(self.book["isbn"], response["id"])
 
             except Exception as error:  # pylint: disable=broad-except
                 logger.info(error)
 
-            if response["data"]["status"] == 400:
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+        return output
 
-                try:
-                    mysql_request = MySQL(isbn=self.book["isbn"])
-                    request = mysql_request.db_mysql()
+    def get_existing(self, post_id):
+        '''Get product of indexed id, {} if it was deleted or trashed, None on error'''
+        try:
+            auth = self.get_woo_request()
+            response = auth.get("products/" + str(post_id), params={"_fields": "id,stock_quantity,status"}).json() # pylint: disable=line-too-long
 
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
+            # Deleted product answers 404 woocommerce_rest_product_invalid_id
+            if response.get("data", {}).get("status") == 404 or response.get("status") == "trash":
+                get_sku_index().remove(self.book["isbn"], post_id)
+                return {}
 
-                if request:
-                    product = self.get_woo_product(request)
-                    if product["stock_quantity"]:
-                        data["stock_quantity"] = int(data["stock_quantity"]) + product["stock_quantity"]  # pylint: disable=line-too-long
-
-                    try:
-                        response = self.update_woo_products(product["id"], data)
-                        output = {
-                            'id'            :response["id"],
-                            'name'          :response["name"],
-                            'link'          :response["permalink"],
-                            'source'        :True
-                        }
-
-                        return output
-
-                    except Exception as error:  # pylint: disable=broad-except
-                        logger.info(error)
-                else:
+            # Send none if status code found in error codes
+            if "data" in response:
+                if response.get("data", {}).get("status") in self.error_codes:
+                    self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
                     return None
 
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+            return None
+
+        return response
+
+    def add_to_existing(self, product, data):
+        '''Add stock of posted book to existing product'''
+        output = None
+        try:
+            if product["stock_quantity"] and data.get("stock_quantity"):
+                data["stock_quantity"] = int(data["stock_quantity"]) + product["stock_quantity"]  # pylint: disable=line-too-long
+
+            response = self.update_woo_products(product["id"], data)
+            output = {
+                'id'            :response["id"],
+                'name'          :response["name"],
+                'link'          :response["permalink"],
+                'source'        :True
+            }
+
         except Exception as error:  # pylint: disable=broad-except
             logger.info(error)
+
         return output
 
     def validate_category(self):
         '''Try to get WooCommerce category before upload product'''
         try:
-            categories_woo = self.get_woo_categories()
-            categories_book = list(self.book["categories"])
-            result = {k for k, v in categories_woo.items() if v in categories_book}
+            result = get_taxonomy("products/categories").ids(self.book["categories"], self.get_woo_pages) # pylint: disable=line-too-long
 
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
@@ -494,36 +442,100 @@ class WooCommerce: # pylint: disable=too-few-public-methods
     def validate_tags(self):
         '''Try to get WooCommerce category before upload product'''
         try:
-            tags_woo = self.get_woo_tags()
-            tags_book = list(self.book["tags"])
-            result = {k for k, v in tags_woo.items() if v in tags_book}
+            result = get_taxonomy("products/tags").ids(self.book["tags"], self.get_woo_pages)
 
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
 
         return result
 
+    def get_woo_page(self, endpoint, page, params=None):
+        '''Get one page of WooCommerce collection'''
+        try:
+            auth = self.get_woo_request()
+            response = auth.get(endpoint, params={"per_page":100, "page":page, **(params or {})}).json() # pylint: disable=line-too-long
+
+            # Send none if status code found in error codes
+            if not isinstance(response, list):
+                return None
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+            return None
+
+        return response
+
+    def get_woo_pages(self, endpoint, params=None):
+        '''Get all pages of WooCommerce collection, pages after first fetched concurrently'''
+        items = []
+        try:
+            auth = self.get_woo_request()
+            response = auth.get(endpoint, params={"per_page":100, "page":1, **(params or {})})
+            first_page = response.json()
+
+            # Send none if status code found in error codes
+            if not isinstance(first_page, list):
+                self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
+                return None
+
+            items += first_page
+            pages = int(response.headers.get("X-WP-TotalPages", 1))
+            if pages > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    for page in executor.map(lambda number: self.get_woo_page(endpoint, number, params), # pylint: disable=line-too-long
+                                             range(2, pages + 1)):
+                        # Incomplete collection is not cached
+                        if page is None:
+                            self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
+                            return None
+                        items += page
+
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+            return None
+
+        return items
+
+    def get_woo_products_pages(self, params=None):
+        '''Get products of all pages, pages after first fetched concurrently'''
+        return self.get_woo_pages("products", params)
+
     def search_for_product(self):
         '''Find product in Woo'''
         try:
-            page_number = 0
-            while True:
-                page_number += 1
-                try:
-                    products = self.get_woo_products(page_number)
-                except Exception as error:  # pylint: disable=broad-except
-                    logger.info(error)
-
-                if products:
-                    for product in products:
-                        if product["sku"] == str(self.book):
-                            return product
-                else:
-                    return None
+            sku = str(self.book)
+            index = get_sku_index()
+
+            # Known SKU, one request for product
+            product_id = index.lookup(sku)
+            if product_id:
+                product = self.get_woo_product(product_id)
+                if product and product.get("sku") == sku:
+                    return product
+
+            # Filter by SKU on server, failing shop is not swept page by page
+            products = self.get_woo_products(1, {"sku": sku})
+            if not isinstance(products, list) or not products:
+                return None
+
+            for product in products:
+                if product.get("sku") == sku:
+                    index.add(sku, product["id"])
+                    return product
+
+            # Server ignored filter, scan catalog once and keep it in index
+            for product_sku, product_id, status, created in sweep_products(): # pylint: disable=unused-variable
+                index.add(product_sku, product_id)
+
+            product_id = index.lookup(sku)
+            if product_id:
+                return self.get_woo_product(product_id)
 
         except Exception as error:  # pylint: disable=broad-except
             logger.info(error)
 
+        return None
+
     @staticmethod
     def list_expander(expander_list):
         '''Expand list elements to string'''
@@ -552,15 +564,57 @@ class WooCommerce: # pylint: disable=too-few-public-methods
         if mode == "pl":
             return translation[word]
 
-def get_product(book, gui):
-    '''Get product form Woo'''
+def sweep_products(modified=None):
+    '''Page through all products, yield (sku, id, status, date_created_gmt)
+
+    WooCommerce v2 API filters only by creation date, so REST refresh picks up new products.
+    '''
+    shop = WooCommerce(book=None)
+    params = {"_fields": "id,sku,status,date_created_gmt"}
+    if modified:
+        params["after"] = modified
+
+    products = shop.get_woo_products_pages(params)
+    if products is None:
+        raise ConnectionError("WooCommerce products not available")
+
+    for product in products:
+        yield product.get("sku"), product.get("id"), product.get("status"), product.get("date_created_gmt") # pylint: disable=line-too-long
+
+_sku_index = None
+_sku_index_lock = threading.Lock()
+
+def get_sku_index():
+    '''Get process wide SKU index, rebuilt when settings are reloaded'''
+    global _sku_index # pylint: disable=global-statement
+    settings = get_settings()
+    with _sku_index_lock:
+        if _sku_index is None or _sku_index[0] is not settings:
+            _sku_index = (settings, SkuIndex(rest_sweep=sweep_products))
+    return _sku_index[1]
+
+_taxonomies = {}
+_taxonomies_lock = threading.Lock()
+
+def get_taxonomy(endpoint):
+    '''Get process wide taxonomy cache of endpoint'''
+    with _taxonomies_lock:
+        if endpoint not in _taxonomies:
+            _taxonomies[endpoint] = TaxonomyCache(endpoint)
+    return _taxonomies[endpoint]
+
+def get_product(book, gui, progress=None):
+    '''Get product form Woo, progress("woocommerce") is called when finished'''
 
     dictionary = {}
 
     try:
-        # Get product ID from DB.
-        mysql_request = MySQL(isbn=book)
-        mysql_response = mysql_request.db_mysql()
+        # Get product ID from index, DB if index could not be loaded.
+        index = get_sku_index()
+        mysql_response = index.get(book)
+        if mysql_response is None and not index.loaded:
+            mysql_request = MySQL(isbn=book)
+            mysql_response = mysql_request.db_mysql()
 
         if mysql_response:
             product = WooCommerce(book=book)
@@ -575,7 +629,7 @@ def get_product(book, gui):
                 try:
                     for attribute in request["attributes"]:
                         dictionary[product.get_translation(attribute["name"],
-                                "en")] = product.list_expander(attribute["options"]).replace("amp;","") # pylint: disable=line-too-long
+                                "en")] = html.unescape(product.list_expander(attribute["options"])) # pylint: disable=line-too-long
                 except Exception as error:  # pylint: disable=broad-except
                     logger.info(error)
 
@@ -593,7 +647,7 @@ def get_product(book, gui):
                     categories_list = []
                     categories = request["categories"]
                     for category in categories:
-                        categories_list.append(category["name"].replace("amp;",""))
+                        categories_list.append(html.unescape(category["name"]))
 
                     dictionary["categories"] = categories_list
                 except Exception as error:  # pylint: disable=broad-except
@@ -603,7 +657,7 @@ def get_product(book, gui):
                     tags_list = []
                     tags = request["tags"]
                     for tag in tags:
-                        tags_list.append(tag["name"].replace("amp;",""))
+                        tags_list.append(html.unescape(tag["name"]))
 
                     dictionary["tags"] = tags_list
                 except Exception as error:  # pylint: disable=broad-except
@@ -640,8 +694,228 @@ def get_product(book, gui):
     except Exception as error:  # pylint: disable=broad-except
         logger.info(error)
 
+    if progress is not None:
+        progress("woocommerce")
+
     return dictionary
 
+def same_value(new, old):
+    '''Compare payload value with product value, numbers and strings are equal if same text'''
+    if new is None or old is None:
+        return new == old or (not new and not old)
+    return str(new).strip() == str(old).strip()
+
+def get_product_diff(data, product):
+    '''Get fields of payload which differ from fetched product, {} if nothing changed'''
+    changes = {}
+    for key, value in data.items():
+        if key in ("categories", "tags"):
+            if {term["id"] for term in value} != {term["id"] for term in product.get(key, [])}:
+                changes[key] = value
+
+        elif key == "attributes":
+            # Attributes are replaced as whole list, term names come back html escaped
+            current = {attribute["id"]: [html.unescape(str(option)) for option in attribute.get("options", [])] # pylint: disable=line-too-long
+                       for attribute in product.get(key, [])}
+            wanted = {attribute["id"]: [html.unescape(str(option)) for option in attribute["options"] if option is not None] # pylint: disable=line-too-long
+                      for attribute in value}
+            if current != wanted:
+                changes[key] = value
+
+        elif key == "images":
+            changes[key] = value
+
+        elif not same_value(value, product.get(key)):
+            changes[key] = value
+
+    return changes
+
+def forget_failed_image(response, data):
+    '''Forget media urls of payload when Woo could not fetch its image, true if forgotten'''
+    error = response.get("error", response) if isinstance(response, dict) else {}
+    if "image" not in str(error.get("code", "")):
+        return False
+
+    images = data.get("images") or []
+    index = get_media_index()
+    for image in images:
+        index.forget(image.get("src"))
+    return bool(images)
+
+def get_output(response, source):
+    '''Format product response like main'''
+    return {
+        'id'            :response["id"],
+        'name'          :response["name"],
+        'link'          :response["permalink"],
+        'source'        :source
+    }
+
+def prepare_batch(books):
+    '''Build (isbn, data) payloads of books, images uploaded concurrently'''
+    images = upload_many(book["image"] for book in books)
+    return [(book["isbn"], WooCommerce(book=book).get_product_data(images.get(book["image"])))
+            for book in books]
+
+def get_stock(shop, ids):
+    '''Get {id: stock_quantity} of not trashed products and set of ids whose lookup failed'''
+    stock = {}
+    failed = set()
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        products = shop.get_woo_pages("products", {
+            "include": ",".join(str(product_id) for product_id in chunk),
+            "_fields": "id,stock_quantity,status"})
+        if products is None:
+            failed.update(chunk)
+            continue
+        for product in products:
+            if product.get("status") != "trash":
+                stock[product["id"]] = product.get("stock_quantity")
+    return stock, failed
+
+def add_stock(data, stock):
+    '''Add current stock of product to posted amount'''
+    try:
+        if stock.get(data["id"]) and data.get("stock_quantity"):
+            data["stock_quantity"] = int(data["stock_quantity"]) + stock[data["id"]]
+    except Exception as error:  # pylint: disable=broad-except
+        logger.info(error)
+
+def duplicate_id(item, isbn):
+    '''Get product id of create failed on duplicate SKU, None for other errors'''
+    error = item["error"]
+    if error.get("code") != "product_invalid_sku":
+        return None
+    product_id = error.get("data", {}).get("resource_id")
+    if product_id:
+        return product_id
+    try:
+        return MySQL(isbn=isbn).db_mysql() or None
+    except Exception as error:  # pylint: disable=broad-except
+        logger.info(error)
+        return None
+
+def send_batch(shop, items, results):
+    '''Send (action, isbn, data) items to products/batch, fill results
+
+    Returns (isbn, data, product id) of creates failed on duplicate SKU.
+    '''
+    index = get_sku_index()
+    duplicates = []
+    for start in range(0, len(items), BATCH_SIZE):
+        chunk = items[start:start + BATCH_SIZE]
+        response = shop.post_woo_batch(
+            create=[data for action, isbn, data in chunk if action == "create"],
+            update=[data for action, isbn, data in chunk if action == "update"])
+
+        if not isinstance(response, dict):
+            for action, isbn, data in chunk:
+                results[isbn] = {'error': 'Batch request failed'}
+            continue
+
+        # Results come back in the order of request
+        responses = {"create": iter(response.get("create", [])),
+                     "update": iter(response.get("update", []))}
+        for action, isbn, data in chunk:
+            item = next(responses[action], None)
+            if not item:
+                results[isbn] = {'error': 'Missing batch result'}
+            elif "error" in item:
+                product_id = duplicate_id(item, isbn) if action == "create" else None
+                if product_id:
+                    duplicates.append((isbn, data, product_id))
+                    continue
+                forget_failed_image(item, data)
+                results[isbn] = {'error': item["error"].get("message", item["error"].get("code"))} # pylint: disable=line-too-long
+            else:
+                try:
+                    results[isbn] = get_output(item, action == "update")
+                    if action == "create":
+                        index.add(isbn, item["id"])
+                except Exception as error:  # pylint: disable=broad-except
+                    logger.info(error)
+                    results[isbn] = {'error': str(error)}
+
+    return duplicates
+
+def batch_main(books):
+    '''Send many products with products/batch, returns {isbn: output or {'error': message}}
+
+    Books are dictionaries of the same shape as for main. Products already in shop get their stock
+    added, like post_woo_products does. ISBN appearing more than once is sent once with amounts summed.
+    '''
+    results = {}
+    unique = {}
+    for book in books:
+        if book["isbn"] not in unique:
+            unique[book["isbn"]] = dict(book)
+            continue
+        try:
+            unique[book["isbn"]]["amount"] = int(unique[book["isbn"]]["amount"] or 0) + int(book["amount"] or 0) # pylint: disable=line-too-long
+        except Exception as error:  # pylint: disable=broad-except
+            logger.info(error)
+
+    shop = WooCommerce(book=None)
+    index = get_sku_index()
+    create = []
+    update = []
+
+    # Existing products, stock is added to current one
+    existing = {}
+    for isbn, book in unique.items():
+        product_id = book.get("id") if book.get("source") else index.get(isbn)
+        if product_id:
+            existing[isbn] = product_id
+
+    # Index could not be loaded, ask MySQL for all SKUs at once
+    if not index.loaded:
+        post_ids = get_post_ids(isbn for isbn, book in unique.items() if not book.get("source"))
+        for isbn, product_id in post_ids.items():
+            existing.setdefault(isbn, product_id)
+
+    stock, failed = get_stock(shop, [product_id for isbn, product_id in existing.items()
+                                     if not unique[isbn].get("source")])
+    for isbn, product_id in list(existing.items()):
+        if unique[isbn].get("source"):
+            continue
+        # Current stock unknown, update would overwrite it
+        if product_id in failed:
+            results[isbn] = {'error': 'Stock lookup failed'}
+        # Indexed id missing from answer was deleted, book is created again
+        elif product_id not in stock:
+            index.remove(isbn, product_id)
+            del existing[isbn]
+
+    for isbn, data in prepare_batch([book for isbn, book in unique.items() if isbn not in results]):
+        if isbn not in existing:
+            create.append((isbn, data))
+            continue
+
+        data["id"] = existing[isbn]
+        add_stock(data, stock)
+        update.append((isbn, data))
+
+    # Creates first, then updates, at most BATCH_SIZE items per request
+    items = [("create", isbn, data) for isbn, data in create] + [("update", isbn, data) for isbn, data in update] # pylint: disable=line-too-long
+    duplicates = send_batch(shop, items, results)
+
+    # SKU exists, but index did not know it yet, stock is added like for indexed products
+    if duplicates:
+        stock, failed = get_stock(shop, [product_id for isbn, data, product_id in duplicates])
+        items = []
+        for isbn, data, product_id in duplicates:
+            if product_id not in stock:
+                results[isbn] = {'error': 'Stock lookup failed' if product_id in failed else 'Duplicate SKU'} # pylint: disable=line-too-long
+                continue
+            index.add(isbn, product_id)
+            data["id"] = product_id
+            add_stock(data, stock)
+            items.append(("update", isbn, data))
+        send_batch(shop, items, results)
+
+    return results
+
 def main(book):
     '''Send product to'''
     shop = WooCommerce(book=book)
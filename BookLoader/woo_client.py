@@ -0,0 +1,148 @@
+'''Shared WooCommerce API client'''
+import json  # Encode request body.
+import logging  # Redact logged urls.
+import re  # Credentials in urls.
+import threading  # Share client between threads.
+import time  # OAuth timestamp.
+
+import requests  # Requests HTTP Library.
+from requests.adapters import HTTPAdapter  # Connection pool size.
+from urllib3.util.retry import Retry  # Retry with backoff.
+from woocommerce import __version__  # woocommerce API version.
+from woocommerce.oauth import OAuth  # Signing for http shops.
+
+from configuration import get_settings  # Settings loaded once.
+
+class RedactFilter(logging.Filter): # pylint: disable=too-few-public-methods
+    '''Hide consumer key and secret of urls in log messages'''
+    PATTERN = re.compile(r'(consumer_(?:key|secret)=)[^&\s\'"]+')
+
+    def filter(self, record):
+        message = record.getMessage()
+        if 'consumer_' in message:
+            record.msg = self.PATTERN.sub(r'\1***', message)
+            record.args = None
+        return True
+
+# urllib3 logs url of every retried request
+for _name in ('urllib3.connectionpool', 'urllib3.util.retry'):
+    logging.getLogger(_name).addFilter(RedactFilter())
+
+class WooClient:
+    '''Thread safe WooCommerce API client with keep-alive session'''
+    def __init__(self, url, consumer_key, consumer_secret, **kwargs): # pylint: disable=too-many-arguments
+        '''init WooClient class, same options as woocommerce.API'''
+        self.url = url
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.wp_api = kwargs.get("wp_api", True)
+        self.version = kwargs.get("version", "wc/v2")
+        self.timeout = kwargs.get("timeout", 10)
+        self.verify_ssl = kwargs.get("verify_ssl", True)
+        self.query_string_auth = kwargs.get("query_string_auth", True)
+        self.is_ssl = self.url.startswith("https")
+
+        # Only idempotent methods, POST may have been processed before 429 or 5xx
+        retry = Retry(
+            total=kwargs.get("retries", 3),
+            backoff_factor=kwargs.get("backoff", 0.5),
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=kwargs.get("pool_size", 10),
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "user-agent": "WooCommerce-Python-REST-API/" + __version__,
+            "accept": "application/json"
+        })
+        # Credentials in header over HTTPS only when query string auth is turned off
+        if self.is_ssl and not self.query_string_auth:
+            self.session.auth = (self.consumer_key, self.consumer_secret)
+
+    def __get_url(self, endpoint):
+        '''Get URL for requests'''
+        url = self.url if self.url.endswith("/") else self.url + "/"
+        api = "wp-json" if self.wp_api else "wc-api"
+        return url + api + "/" + self.version + "/" + endpoint
+
+    def __request(self, method, endpoint, data, params=None, **kwargs):
+        '''Do requests'''
+        params = dict(params or {})
+        timeout = kwargs.pop("timeout", self.timeout)
+        url = self.__get_url(endpoint)
+        headers = {}
+
+        if self.is_ssl and self.query_string_auth:
+            params.update({
+                "consumer_key": self.consumer_key,
+                "consumer_secret": self.consumer_secret
+            })
+        elif not self.is_ssl:
+            url = OAuth(
+                url=requests.Request("GET", url, params=params).prepare().url,
+                consumer_key=self.consumer_key,
+                consumer_secret=self.consumer_secret,
+                version=self.version,
+                method=method,
+                oauth_timestamp=int(time.time())
+            ).get_oauth_url()
+            params = {}
+
+        if data is not None:
+            data = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            headers["content-type"] = "application/json;charset=utf-8"
+
+        return self.session.request(
+            method=method,
+            url=url,
+            verify=self.verify_ssl,
+            params=params,
+            data=data,
+            timeout=timeout,
+            headers=headers,
+            **kwargs
+        )
+
+    def get(self, endpoint, **kwargs):
+        '''GET requests'''
+        return self.__request("GET", endpoint, None, **kwargs)
+
+    def post(self, endpoint, data, **kwargs):
+        '''POST requests'''
+        return self.__request("POST", endpoint, data, **kwargs)
+
+    def put(self, endpoint, data, **kwargs):
+        '''PUT requests'''
+        return self.__request("PUT", endpoint, data, **kwargs)
+
+    def delete(self, endpoint, **kwargs):
+        '''DELETE requests'''
+        return self.__request("DELETE", endpoint, None, **kwargs)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    '''Get process wide client, rebuilt when settings are reloaded'''
+    global _client # pylint: disable=global-statement
+    settings = get_settings()
+    with _client_lock:
+        if _client is None or _client[0] is not settings:
+            _client = (settings, WooClient(
+                url=settings.get("WooCommerce", "url"),
+                consumer_key=settings.get("WooCommerce", "key"),
+                consumer_secret=settings.get("WooCommerce", "secret"),
+                wp_api=True,
+                version="wc/v2",
+                query_string_auth=settings.getboolean("WooCommerce", "query_string_auth",
+                                                      fallback=True),
+                verify_ssl=True,
+                timeout=settings.getfloat("WooCommerce", "timeout", fallback=10),
+                pool_size=settings.getint("WooCommerce", "pool_size", fallback=10),
+                retries=settings.getint("WooCommerce", "retries", fallback=3),
+                backoff=settings.getfloat("WooCommerce", "backoff", fallback=0.5)
+            ))
+    return _client[1]
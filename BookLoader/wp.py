@@ -1,43 +1,84 @@
 '''WordPress API integrator'''
 import base64  # Data encodings.
-import configparser  # Read config file.
 import inspect  # Get function name.
 import logging  # Logging errors.
+import mimetypes  # Content type of uploaded file.
 import os  # Just os module?
-from pathlib import Path  # Create a directory if needed.similarity.
+import threading  # Share session between threads.
+from concurrent.futures import ThreadPoolExecutor  # Download media concurrently.
 
 import requests  # Requests HTTP Library.
+from requests.adapters import HTTPAdapter  # Connection pool size.
+from urllib3.util.retry import Retry  # Retry with backoff.
+
+from configuration import get_logger, get_settings  # Settings loaded once.
+from image_processor import main as process_image  # Resize and recompress cover.
+from image_processor import process_many  # Process covers on all cores.
+from media_index import get_bytes_hash, get_hash, get_media_index  # Content hash -> media url.
 
-current_dir = (os.path.dirname(os.path.realpath(__file__)))
-Path(os.path.join(current_dir, "logs")).mkdir(parents=True, exist_ok=True)
-logging_path = os.path.join(current_dir, "logs", "WP.log")
 
 # DEBUG -> WARNING :
-logging.basicConfig(filename=logging_path, level=logging.DEBUG,
-                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
-logger=logging.getLogger(__name__)
+logger=get_logger(__name__, "WP.log", logging.DEBUG)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    '''Get process wide authorized keep-alive session, rebuilt when settings are reloaded'''
+    global _session # pylint: disable=global-statement
+    settings = get_settings()
+    with _session_lock:
+        if _session is None or _session[0] is not settings:
+            user = settings.get("WordPress", "user")
+            password = settings.get("WordPress", "password")
+            token = base64.standard_b64encode((user + ':' + password).encode('utf-8'))
+
+            retry = Retry(
+                total=settings.getint("WordPress", "retries", fallback=3),
+                backoff_factor=settings.getfloat("WordPress", "backoff", fallback=0.5),
+                status_forcelist=(429, 500, 502, 503, 504),
+                respect_retry_after_header=True,
+                raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, max_retries=retry,
+                                  pool_maxsize=settings.getint("WordPress", "workers", fallback=8))
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({'Authorization': 'Basic ' + token.decode('utf-8')})
+            _session = (settings, session)
+    return _session[1]
 
 class WordPress: # pylint: disable=too-few-public-methods
     '''WordPress class'''
     def __init__(self, image):
         '''init WordPress class'''
-        config = configparser.ConfigParser()
-        config.read(os.path.join(os.path.dirname(__file__), 'config', 'conf.ini'))
-        self.wp_url = config.get("WordPress", "url")
-        self.wp_user = config.get("WordPress", "user")
-        self.wp_pass = config.get("WordPress", "password")
-        self.token = base64.standard_b64encode((self.wp_user + ':' + self.wp_pass).encode('utf-8'))
-        self.header = {'Authorization': 'Basic ' + self.token.decode('utf-8')}
+        settings = get_settings()
+        self.wp_url = settings.get("WordPress", "url")
+        self.session = get_session()
+        self.timeout = settings.getfloat("WordPress", "timeout", fallback=60)
         self.image = image
         self.error_codes = [401, 404, 500]
         self.error_catch = []
 
     def post_wp_image(self):
-        '''Get WordPress api request'''
+        '''Get WordPress api request, identical image is uploaded only once'''
+        image_path = None
         try:
-            media = {'file': open(self.image,'rb')}
+            index = get_media_index()
+            content_hash = get_hash(self.image)
+            # Indexed url is trusted, Woo image errors forget it (see woo.forget_failed_image)
+            url = index.get(content_hash)
+            if url:
+                return url
 
-            response = requests.post(self.wp_url + '/media', headers=self.header, files=media)
+            # Raw body is streamed from file, not built in memory like multipart
+            headers = {
+                'Content-Type': mimetypes.guess_type(self.image)[0] or 'image/jpeg',
+                'Content-Disposition': 'attachment; filename="%s"' % os.path.basename(self.image)
+            }
+            with open(self.image, 'rb') as file:
+                response = self.session.post(self.wp_url + '/media', data=file, headers=headers,
+                                             timeout=self.timeout)
 
             # Send none if status code found in error codes
             if int(response.status_code) in self.error_codes:
@@ -45,12 +86,62 @@ class WordPress: # pylint: disable=too-few-public-methods
                 return None
 
             image_path = response.json()["guid"]["raw"]
+            index.set(content_hash, image_path, response.json().get("id"))
         except Exception as error: # pylint: disable=broad-except
             logger.info(error)
         return image_path
 
+    def get_wp_media(self, page):
+        '''Get page of media library and number of pages'''
+        response = self.session.get(self.wp_url + '/media', timeout=self.timeout, params={
+            "per_page": 100, "page": page, "media_type": "image", "_fields": "id,source_url"})
+        if int(response.status_code) != 200:
+            self.error_catch.append(inspect.getouterframes(inspect.currentframe())[0].function) # pylint: disable=line-too-long
+            return [], 0
+        return response.json(), int(response.headers.get("X-WP-TotalPages", 1))
+
+def seed_media_index(workers=8):
+    '''Hash every image of media library into index, returns number of new entries'''
+    media = WordPress(image=None)
+    index = get_media_index()
+    items, pages = media.get_wp_media(1)
+
+    def seed(item):
+        '''Download and hash single image'''
+        try:
+            # Media can be served from other host, credentials are not sent there
+            response = media.session.get(item["source_url"], timeout=media.timeout,
+                                         headers={'Authorization': None})
+            if response.status_code == 200:
+                content_hash = get_bytes_hash(response.content)
+                if index.get(content_hash) is None:
+                    index.set(content_hash, item["source_url"], item["id"])
+                    return 1
+        except Exception as error: # pylint: disable=broad-except
+            logger.info(error)
+        return 0
+
+    for page in range(2, pages + 1):
+        items += media.get_wp_media(page)[0]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(seed, items))
+
+def upload(image):
+    '''Upload image as it is'''
+    media = WordPress(image=image)
+    return media.post_wp_image()
+
+def upload_many(images, workers=None):
+    '''Process and upload many images at once, returns {image: url or None}'''
+    images = list(dict.fromkeys(image for image in images if image))
+    if workers is None:
+        workers = get_settings().getint("WordPress", "workers", fallback=8)
+
+    processed = process_many(images)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(zip(images, executor.map(upload, (processed[image] for image in images))))
+
 def main(image):
     '''Upload image to WordPress media'''
-    media = WordPress(image=image)
-    request = media.post_wp_image()
-    return request
+    return upload(process_image(image))